@@ -2,7 +2,21 @@ from fastapi import APIRouter
 from app.core.conf import settings
 from .v1.auth.auth import router as auth_router
 from .v1.user_api import router as user_router
+from .v1.fuzz_test_suite_api import router as fuzz_test_suite_router
+from .v1.fuzz_test_case_api import router as fuzz_test_case_router
+from .v1.fuzz_test_field_api import router as fuzz_test_field_router
+from .v1.monitor_api import router as monitor_router
+from .v1.log_api import router as log_router
+from .v1.menu_api import router as menu_router
+from .v1.dept_api import router as dept_router
 
 v1 = APIRouter(prefix=settings.API_V1_STR)
 v1.include_router(auth_router, prefix='/auth', tags=['认证'])
-v1.include_router(user_router, prefix='/users', tags=['用户管理'])
\ No newline at end of file
+v1.include_router(user_router, prefix='/users', tags=['用户管理'])
+v1.include_router(fuzz_test_suite_router, prefix='/suites', tags=['模糊测试套件'])
+v1.include_router(fuzz_test_case_router, prefix='/cases', tags=['模糊测试用例'])
+v1.include_router(fuzz_test_field_router, prefix='/fields', tags=['模糊测试字段'])
+v1.include_router(monitor_router, prefix='/monitors', tags=['系统监控'])
+v1.include_router(log_router, prefix='/logs', tags=['日志管理'])
+v1.include_router(menu_router, prefix='/menus', tags=['菜单管理'])
+v1.include_router(dept_router, prefix='/depts', tags=['部门管理'])
@@ -0,0 +1,20 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+
+from app.common.response.response_schema import response_base
+from app.services.dept_service import DeptService
+from app.utils.auth_helper import DependsJwtAuth
+
+router = APIRouter()
+
+
+@router.get("", summary="获取部门树", dependencies=[DependsJwtAuth])
+async def get_dept_tree(
+    name: Annotated[str | None, Query(description="部门名称")] = None,
+    leader: Annotated[str | None, Query(description="部门负责人")] = None,
+    phone: Annotated[str | None, Query(description="联系电话")] = None,
+    status: Annotated[int | None, Query(description="部门状态")] = None,
+):
+    dept = await DeptService.get_dept_tree(name=name, leader=leader, phone=phone, status=status)
+    return response_base.fast_success(data=dept)
@@ -0,0 +1,55 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+
+from app.common.pagination import DependsKeyset, keyset_paging_data
+from app.common.response.response_schema import response_base
+from app.database.db_mysql import CurrentSession
+from app.models import FuzzTestCase
+from app.schemas.fuzz_test_case_schema import GetCaseListDetail
+from app.services.fuzz_test_case_service import FuzzTestCaseService
+from app.utils.auth_helper import DependsJwtAuth, get_user_id_by_token
+
+router = APIRouter()
+
+
+@router.get(
+    "/search",
+    summary="（键集分页）检索测试用例",
+    description="例如 field_type=String&default_contains=USER 返回含有默认值包含 USER 的 String 字段的用例",
+)
+async def search_cases(
+    db: CurrentSession,
+    page: DependsKeyset,
+    keyword: Annotated[str | None, Query(description="用例或套件的名称、描述关键字")] = None,
+    suite_id: Annotated[int | None, Query(description="所属套件 id")] = None,
+    field_type: Annotated[str | None, Query(description="字段类型")] = None,
+    field_name: Annotated[str | None, Query(description="字段名称")] = None,
+    default_contains: Annotated[str | None, Query(description="字段默认值包含的内容")] = None,
+    token: str = DependsJwtAuth,
+):
+    user_id = await get_user_id_by_token(token)
+    case_select = await FuzzTestCaseService.get_search_select(
+        user_id=user_id,
+        keyword=keyword,
+        suite_id=suite_id,
+        field_type=field_type,
+        field_name=field_name,
+        default_contains=default_contains,
+    )
+    page_data = await keyset_paging_data(db, case_select, FuzzTestCase.id, GetCaseListDetail, page)
+    return response_base.fast_success(data=page_data)
+
+
+@router.get("", summary="（键集分页）获取测试用例列表")
+async def get_cases(
+    db: CurrentSession,
+    page: DependsKeyset,
+    suite_id: Annotated[int, Query(description="所属套件 id")],
+    name: Annotated[str | None, Query(description="名称前缀")] = None,
+    token: str = DependsJwtAuth,
+):
+    user_id = await get_user_id_by_token(token)
+    case_select = await FuzzTestCaseService.get_select(user_id=user_id, suite_id=suite_id, name=name)
+    page_data = await keyset_paging_data(db, case_select, FuzzTestCase.id, GetCaseListDetail, page)
+    return response_base.fast_success(data=page_data)
@@ -0,0 +1,40 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+
+from app.common.pagination import DependsKeyset, keyset_paging_data
+from app.common.response.response_schema import response_base
+from app.database.db_mysql import CurrentSession
+from app.models import FuzzTestField
+from app.schemas.fuzz_test_field_schema import GetFieldListDetail
+from app.services.fuzz_test_field_service import FuzzTestFieldService
+from app.utils.auth_helper import DependsJwtAuth, get_user_id_by_token
+from app.utils.export import stream_scalars
+
+router = APIRouter()
+
+
+@router.get("/all", summary="（流式）获取用例的全部测试字段")
+async def get_all_fields(
+    case_id: Annotated[int, Query(description="所属用例 id")],
+    token: str = DependsJwtAuth,
+):
+    user_id = await get_user_id_by_token(token)
+    field_select = await FuzzTestFieldService.get_select(user_id=user_id, case_id=case_id)
+    fields = stream_scalars(field_select.order_by(FuzzTestField.id))
+    return response_base.stream_success(GetFieldListDetail.model_validate(field) async for field in fields)
+
+
+@router.get("", summary="（键集分页）获取测试字段列表")
+async def get_fields(
+    db: CurrentSession,
+    page: DependsKeyset,
+    case_id: Annotated[int, Query(description="所属用例 id")],
+    name: Annotated[str | None, Query(description="名称前缀")] = None,
+    type: Annotated[str | None, Query(description="字段类型")] = None,
+    token: str = DependsJwtAuth,
+):
+    user_id = await get_user_id_by_token(token)
+    field_select = await FuzzTestFieldService.get_select(user_id=user_id, case_id=case_id, name=name, field_type=type)
+    page_data = await keyset_paging_data(db, field_select, FuzzTestField.id, GetFieldListDetail, page)
+    return response_base.fast_success(data=page_data)
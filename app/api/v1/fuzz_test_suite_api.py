@@ -0,0 +1,34 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+
+from app.common.pagination import DependsKeyset, keyset_paging_data
+from app.common.response.response_schema import response_base
+from app.database.db_mysql import CurrentSession
+from app.models import FuzzTestSuite
+from app.schemas.fuzz_test_suite_schema import CloneSuiteSchema, GetSuiteListDetail
+from app.services.fuzz_test_suite_service import FuzzTestSuiteService
+from app.utils.auth_helper import DependsJwtAuth, get_user_id_by_token
+
+router = APIRouter()
+
+
+@router.get("", summary="（键集分页）获取测试套件列表")
+async def get_suites(
+    db: CurrentSession,
+    page: DependsKeyset,
+    name: Annotated[str | None, Query(description="名称前缀")] = None,
+    is_system: Annotated[bool | None, Query(description="是否为系统套件")] = None,
+    token: str = DependsJwtAuth,
+):
+    user_id = await get_user_id_by_token(token)
+    suite_select = await FuzzTestSuiteService.get_select(user_id=user_id, name=name, is_system=is_system)
+    page_data = await keyset_paging_data(db, suite_select, FuzzTestSuite.id, GetSuiteListDetail, page)
+    return response_base.fast_success(data=page_data)
+
+
+@router.post("/{suite_id}/clone", summary="复制测试套件")
+async def clone_suite(suite_id: int, obj: CloneSuiteSchema, token: str = DependsJwtAuth):
+    user_id = await get_user_id_by_token(token)
+    new_suite_id = await FuzzTestSuiteService.clone(user_id=user_id, suite_id=suite_id, obj=obj)
+    return await response_base.success(data={"id": new_suite_id})
@@ -0,0 +1,44 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from app.common.enums import ExportFormatType
+from app.services.login_log_service import LoginLogService
+from app.services.opera_log_service import OperaLogService
+from app.utils.auth_helper import DependsSuperUser
+from app.utils.export import EXPORT_MEDIA_TYPES
+from app.utils.timezone import timezone
+
+router = APIRouter()
+
+
+def _export_response(body, fmt: ExportFormatType, name: str) -> StreamingResponse:
+    filename = f"{name}_{timezone.now().strftime('%Y%m%d%H%M%S')}.{fmt.value}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/opera/export", summary="（流式）导出操作日志", dependencies=[DependsSuperUser])
+async def export_opera_logs(
+    fmt: Annotated[ExportFormatType, Query(description="导出格式")] = ExportFormatType.ndjson,
+    username: Annotated[str | None, Query(description="用户名")] = None,
+    status: Annotated[int | None, Query(description="操作状态（0异常 1正常）")] = None,
+    ip: Annotated[str | None, Query(description="IP地址")] = None,
+):
+    body = OperaLogService.export(fmt=fmt, username=username, status=status, ip=ip)
+    return _export_response(body, fmt, "opera_log")
+
+
+@router.get("/login/export", summary="（流式）导出登录日志", dependencies=[DependsSuperUser])
+async def export_login_logs(
+    fmt: Annotated[ExportFormatType, Query(description="导出格式")] = ExportFormatType.ndjson,
+    username: Annotated[str | None, Query(description="用户名")] = None,
+    status: Annotated[int | None, Query(description="登录状态(0失败 1成功)")] = None,
+    ip: Annotated[str | None, Query(description="IP地址")] = None,
+):
+    body = LoginLogService.export(fmt=fmt, username=username, status=status, ip=ip)
+    return _export_response(body, fmt, "login_log")
@@ -0,0 +1,27 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+
+from app.common.response.response_schema import response_base
+from app.services.menu_service import MenuService
+from app.services.user_service import UserService
+from app.utils.auth_helper import DependsJwtAuth, get_user_id_by_token
+
+router = APIRouter()
+
+
+@router.get("/sidebar", summary="获取用户侧边栏菜单树")
+async def get_user_sidebar_tree(token: str = DependsJwtAuth):
+    user_id = await get_user_id_by_token(token)
+    principal = await UserService.get_principal(user_id)
+    menu = await MenuService.get_user_menu_tree(principal)
+    return response_base.fast_success(data=menu)
+
+
+@router.get("", summary="获取菜单树", dependencies=[DependsJwtAuth])
+async def get_menu_tree(
+    title: Annotated[str | None, Query(description="菜单标题")] = None,
+    status: Annotated[int | None, Query(description="菜单状态")] = None,
+):
+    menu = await MenuService.get_menu_tree(title=title, status=status)
+    return response_base.fast_success(data=menu)
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse
+
+from app.common.cache import cache_stats
+from app.common.enums import RollupGranularityType
+from app.common.metrics import registry
+from app.common.profiler import query_profiler
+from app.common.response.response_schema import response_base
+from app.core.conf import settings
+from app.database.db_mysql import get_pool_status
+from app.services.monitor_service import status_sampler
+from app.services.request_rollup_service import RequestRollupService
+from app.utils.auth_helper import DependsSuperUser
+from app.utils.timezone import timezone
+
+router = APIRouter()
+
+
+@router.get("/db_pool", summary="数据库连接池监控", dependencies=[DependsSuperUser])
+async def get_db_pool_info():
+    return await response_base.success(data=get_pool_status())
+
+
+@router.get("/cache", summary="缓存命中统计", dependencies=[DependsSuperUser])
+async def get_cache_info():
+    return await response_base.success(data={name: stats.as_dict() for name, stats in cache_stats.items()})
+
+
+@router.get("/requests", summary="请求统计（耗时趋势）", dependencies=[DependsSuperUser])
+async def get_request_rollups(
+    granularity: Annotated[RollupGranularityType, Query(description="时间粒度")] = RollupGranularityType.minute,
+    start: Annotated[datetime | None, Query(description="开始时间，默认为结束时间前 1 小时（小时粒度为 1 天）")] = None,
+    end: Annotated[datetime | None, Query(description="结束时间，默认为当前时间")] = None,
+    path: Annotated[str | None, Query(description="请求路径")] = None,
+    username: Annotated[str | None, Query(description="用户名")] = None,
+):
+    end = end or timezone.now()
+    if start is None:
+        start = end - (timedelta(hours=1) if granularity == RollupGranularityType.minute else timedelta(days=1))
+    data = await RequestRollupService.get_series(
+        granularity=granularity, start=start, end=end, path=path, username=username
+    )
+    return response_base.fast_success(data=data)
+
+
+@router.get("/metrics", summary="Prometheus 指标", response_class=PlainTextResponse)
+async def get_metrics(request: Request):
+    # 抓取端一般无法携带 JWT，按客户端 IP 白名单限制访问
+    if request.client is None or request.client.host not in settings.MONITOR_METRICS_ALLOW_HOSTS:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "不允许访问监控指标")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/server", summary="服务器状态", dependencies=[DependsSuperUser])
+async def get_server_info():
+    return response_base.fast_success(data=status_sampler.server)
+
+
+@router.get("/redis", summary="redis 状态", dependencies=[DependsSuperUser])
+async def get_redis_info():
+    return response_base.fast_success(data=status_sampler.redis)
+
+
+@router.get("/history", summary="服务器与 redis 状态历史", dependencies=[DependsSuperUser])
+async def get_status_history():
+    return response_base.fast_success(data=list(status_sampler.history))
+
+
+@router.get("/profiler", summary="获取 SQL 分析开关", dependencies=[DependsSuperUser])
+async def get_profiler():
+    return await response_base.success(data={"enabled": query_profiler.enabled})
+
+
+@router.put("/profiler", summary="开关 SQL 分析", dependencies=[DependsSuperUser])
+async def set_profiler(enabled: Annotated[bool, Query(description="是否开启")]):
+    await query_profiler.set_enabled(enabled)
+    return await response_base.success(data={"enabled": enabled})
@@ -61,7 +61,7 @@ async def user_login(request: Request, login_data: UserLoginSchema, background_t
 # async def add_user(request: Request, obj: AddUserParam):
 #     await UserService.add(request=request, obj=obj)
 #     current_user = await UserService.get_userinfo(username=obj.username)
-#     data = GetUserInfoListDetails(**await select_as_dict(current_user))
+#     data = GetUserInfoListDetails(**select_as_dict(current_user))
 #     return await response_base.success(data=data)
 #
 #
@@ -75,14 +75,14 @@ async def user_login(request: Request, login_data: UserLoginSchema, background_t
 #
 # @router.get('/me', summary='获取当前用户信息', dependencies=[DependsJwtAuth], response_model_exclude={'password'})
 # async def get_current_userinfo(request: Request):
-#     data = GetCurrentUserInfoDetail(**await select_as_dict(request.user))
+#     data = GetCurrentUserInfoDetail(**select_as_dict(request.user))
 #     return await response_base.success(data=data)
 #
 #
 # @router.get('/{username}', summary='查看用户信息', dependencies=[DependsJwtAuth])
 # async def get_user(username: str):
 #     current_user = await UserService.get_userinfo(username=username)
-#     data = GetUserInfoListDetails(**await select_as_dict(current_user))
+#     data = GetUserInfoListDetails(**select_as_dict(current_user))
 #     return await response_base.success(data=data)
 #
 #
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于 redis_client 的读穿透缓存
+
+- SingleFlight: 合并进程内同一 key 的并发调用
+- RedisCache: 可选本地 LRU + redis 两级缓存，支持过期时间抖动、过期后先返回旧值再后台刷新（stale-while-revalidate）、
+  跨进程加载锁以及命中率统计
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import random
+import time
+
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, TypeVar
+
+from app.common.local_cache import TTLCache
+from app.common.log import logger as log
+from app.common.redis import redis_client
+
+T = TypeVar('T')
+
+
+class Expiring(NamedTuple):
+    """loader 返回此类型时按指定的新鲜时间缓存且不返回旧值，用于降级结果等只应短暂缓存的值"""
+
+    value: Any
+    ttl: int
+
+
+def create_detached_task(coro: Awaitable[T]) -> asyncio.Task[T]:
+    """
+    在空的 contextvars 上下文中创建任务
+
+    共享的加载任务不能继承第一个调用方的上下文，否则会使用该请求的 session（请求结束时被关闭），
+    并把 SQL 计入该请求的指标与分析数据
+
+    :param coro:
+    :return:
+    """
+    return asyncio.get_running_loop().create_task(coro, context=contextvars.Context())
+
+
+class SingleFlight:
+    """合并同一 key 的并发调用，只有第一个调用会真正执行，其余调用等待并共享其结果"""
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is None:
+            future = create_detached_task(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        # shield: 某个等待方被取消时不影响其他等待同一结果的调用
+        return await asyncio.shield(future)
+
+
+class CacheStats:
+    """缓存命中统计"""
+
+    __slots__ = ('local_hits', 'hits', 'stale_hits', 'misses', 'loads', 'load_errors')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self) -> dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# 缓存名称 -> 统计信息
+cache_stats: dict[str, CacheStats] = {}
+
+
+class RedisCache:
+    """
+    读穿透缓存
+
+    redis 中保存 [新鲜截止时间戳, 值]，key 的过期时间为 ttl + stale_ttl；超过新鲜截止时间但仍未过期的值会被直接返回，
+    同时在后台刷新
+    """
+
+    def __init__(
+        self,
+        name: str,
+        prefix: str,
+        ttl: int,
+        *,
+        jitter: float = 0.1,
+        stale_ttl: int = 0,
+        lock_timeout: float | None = None,
+        local_maxsize: int = 0,
+        local_ttl: float = 60,
+    ):
+        """
+        :param name: 缓存名称，用于统计
+        :param prefix: redis key 前缀
+        :param ttl: 新鲜时间，单位：秒
+        :param jitter: 新鲜时间的随机增量比例，避免大量 key 同时过期
+        :param stale_ttl: 过期后仍可返回旧值的时间，单位：秒，为 0 时关闭 stale-while-revalidate
+        :param lock_timeout: 跨进程加载锁的超时时间，单位：秒，为空时只在进程内合并
+        :param local_maxsize: 本地 LRU 缓存数量，为 0 时关闭本地缓存
+        :param local_ttl: 本地缓存时间，单位：秒
+        """
+        self.prefix = prefix
+        self.ttl = ttl
+        self.jitter = jitter
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+        self.local = TTLCache(local_maxsize) if local_maxsize else None
+        self.local_ttl = local_ttl
+        self.stats = cache_stats.setdefault(name, CacheStats())
+        self._flight = SingleFlight()
+        self._background: set[asyncio.Task] = set()
+
+    def _key(self, key: str) -> str:
+        return f'{self.prefix}:{key}'
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        读取缓存，未命中时调用 loader 加载并写入缓存，loader 返回 None 时不缓存，返回 Expiring 时按其 ttl 缓存
+
+        :param key: 缓存 key（不含前缀）
+        :param loader: 加载函数
+        :return:
+        """
+        if self.local is not None:
+            value = self.local.get(key)
+            if value is not None:
+                self.stats.local_hits += 1
+                return value
+        payload = await self._get_payload(key)
+        if payload is not None:
+            fresh_until, value = payload
+            if fresh_until > time.time():
+                self.stats.hits += 1
+            else:
+                self.stats.stale_hits += 1
+                self._revalidate(key, loader)
+            self._set_local(key, value)
+            return value
+        self.stats.misses += 1
+        return await self._flight.do(key, lambda: self._load(key, loader))
+
+    async def delete(self, key: str) -> None:
+        if self.local is not None:
+            self.local.pop(key)
+        await redis_client.delete(self._key(key))
+
+    def decorate(self, key_func: Callable[..., str]):
+        """
+        装饰器形式
+
+        E.g. ::
+
+            @some_cache.decorate(lambda ip: ip)
+            async def load_location(ip: str) -> dict | None: ...
+        """
+
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                return await self.get_or_load(key_func(*args, **kwargs), lambda: func(*args, **kwargs))
+
+            return wrapper
+
+        return decorator
+
+    def _set_local(self, key: str, value: Any, ttl: float | None = None) -> None:
+        if self.local is not None:
+            self.local.set(key, value, self.local_ttl if ttl is None else min(ttl, self.local_ttl))
+
+    async def _get_payload(self, key: str) -> list | None:
+        data = await redis_client.get(self._key(key))
+        if not data:
+            return None
+        try:
+            payload = json.loads(data)
+        except ValueError:
+            return None
+        if not isinstance(payload, list) or len(payload) != 2:
+            return None
+        return payload
+
+    async def _set(self, key: str, value: Any, ttl: int | None = None) -> None:
+        fresh = (self.ttl if ttl is None else ttl) * (1 + random.uniform(0, self.jitter))
+        stale = self.stale_ttl if ttl is None else 0
+        payload = json.dumps([time.time() + fresh, value], ensure_ascii=False)
+        await redis_client.set(self._key(key), payload, ex=max(int(fresh + stale), 1))
+        self._set_local(key, value, ttl)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        lock_key = f'{self.prefix}_lock:{key}'
+        locked = False
+        if self.lock_timeout:
+            locked = await redis_client.set(lock_key, '1', nx=True, px=int(self.lock_timeout * 1000))
+            if not locked:
+                # 其他进程正在加载，等待其写入结果
+                deadline = time.monotonic() + self.lock_timeout
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                    payload = await self._get_payload(key)
+                    if payload is not None:
+                        self._set_local(key, payload[1])
+                        return payload[1]
+        try:
+            self.stats.loads += 1
+            value = await loader()
+        except Exception:
+            self.stats.load_errors += 1
+            raise
+        finally:
+            if locked:
+                await redis_client.delete(lock_key)
+        ttl = None
+        if isinstance(value, Expiring):
+            value, ttl = value
+        if value is not None:
+            await self._set(key, value, ttl)
+        return value
+
+    def _revalidate(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        async def refresh():
+            try:
+                await self._flight.do(key, lambda: self._load(key, loader))
+            except Exception as e:
+                log.error(f'缓存 {self.prefix}:{key} 后台刷新失败，错误信息：{e}')
+
+        task = create_detached_task(refresh())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
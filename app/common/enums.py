@@ -80,3 +80,17 @@ class StatusType(IntEnum):
 
     disable = 0
     enable = 1
+
+
+class ExportFormatType(StrEnum):
+    """导出格式"""
+
+    ndjson = 'ndjson'
+    csv = 'csv'
+
+
+class RollupGranularityType(StrEnum):
+    """请求统计时间粒度"""
+
+    minute = 'minute'
+    hour = 'hour'
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""进程内缓存"""
+import time
+
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """
+    进程内 LRU 缓存，每个条目带有独立的过期时间
+
+    仅在事件循环线程中使用，不做加锁处理
+    """
+
+    __slots__ = ('maxsize', '_data')
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        value, expire_at = item
+        if expire_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """
+        写入缓存
+
+        :param key:
+        :param value:
+        :param ttl: 存活时间，单位：秒，小于等于 0 时不写入
+        :return:
+        """
+        if ttl <= 0:
+            return
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def pop_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """
+        删除所有满足条件的条目
+
+        :param predicate: 接收 (key, value) 的判断函数
+        :return: 删除的条目数量
+        """
+        keys = [key for key, (value, _) in self._data.items() if predicate(key, value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
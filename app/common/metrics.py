@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内指标，输出 Prometheus 文本格式
+
+指标只在事件循环线程中更新，计数均为普通的 int / float 自增，不加锁
+"""
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Iterable
+
+# 默认耗时分桶，单位：秒
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> list[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        return [f'{self.name}{_labels(self.labelnames, k)} {v}' for k, v in self.values.items()]
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, *labels, value: float) -> None:
+        self.values[labels] = value
+
+
+class CallbackGauge(_Metric):
+    """渲染时通过回调取值的 gauge，用于连接池等已有统计；带标签时回调返回 标签值元组 -> 值"""
+
+    type = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], float | dict[tuple, float]],
+        labelnames: Iterable[str] = (),
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def render(self) -> list[str]:
+        if not self.labelnames:
+            return [f'{self.name} {self.callback()}']
+        return [f'{self.name}{_labels(self.labelnames, k)} {v}' for k, v in self.callback().items()]
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: tuple = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [各分桶计数（非累计）..., +Inf 计数, 总和]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        data = self.values.get(labels)
+        if data is None:
+            data = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        data[bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+
+    def render(self) -> list[str]:
+        lines = []
+        for labels, data in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                le = _labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            cumulative += data[len(self.buckets)]
+            le = _labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{le} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {data[-1]}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.register(
+    Counter('http_requests_total', '请求总数', ('method', 'route', 'status'))
+)
+http_request_duration = registry.register(
+    Histogram('http_request_duration_seconds', '请求耗时', ('method', 'route'))
+)
+http_requests_in_flight = registry.register(Gauge('http_requests_in_flight', '正在处理的请求数'))
+http_request_db_queries = registry.register(
+    Histogram(
+        'http_request_db_queries', '每个请求执行的 SQL 数量', ('route',), buckets=(0, 1, 2, 5, 10, 20, 50, 100)
+    )
+)
+http_request_db_duration = registry.register(
+    Histogram('http_request_db_duration_seconds', '每个请求的 SQL 总耗时', ('route',))
+)
+db_query_duration = registry.register(Histogram('db_query_duration_seconds', 'SQL 执行耗时'))
+db_pool_checkout_wait = registry.register(Histogram('db_pool_checkout_wait_seconds', '连接池签出等待时间（主库与只读副本合计）'))
+redis_command_duration = registry.register(
+    Histogram('redis_command_duration_seconds', 'redis 命令耗时', ('command',))
+)
+
+
+class RequestDBStats:
+    """单个请求的 SQL 统计"""
+
+    __slots__ = ('queries', 'duration')
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+
+
+# 由 MetricsMiddleware 在每个请求开始时设置
+request_db_stats: ContextVar[RequestDBStats | None] = ContextVar('request_db_stats', default=None)
+
+
+def record_query(duration: float) -> None:
+    """记录一次 SQL 执行，由 SQLAlchemy 事件调用"""
+    db_query_duration.observe(duration)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.duration += duration
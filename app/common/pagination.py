@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+键集（seek）分页
+
+与 offset 分页不同，键集分页通过 ``id > after`` 定位下一页，翻页代价与页码无关，
+适合模糊测试用例库这类行数较多且按主键递增的列表。
+"""
+from typing import Annotated, Any, Generic, Sequence, TypeVar
+
+from fastapi import Depends, Query
+from pydantic import BaseModel
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.schemas.base import SchemaBase
+
+T = TypeVar('T')
+SchemaT = TypeVar('SchemaT', bound=BaseModel)
+
+
+class KeysetParams:
+    """键集分页查询参数"""
+
+    def __init__(
+        self,
+        after: Annotated[int | None, Query(description='上一页最后一条数据的 id')] = None,
+        size: Annotated[int, Query(ge=1, le=100, description='每页数量')] = 20,
+        with_total: Annotated[bool, Query(description='是否返回总数，需要额外的 count 查询')] = False,
+    ):
+        self.after = after
+        self.size = size
+        self.with_total = with_total
+
+
+DependsKeyset = Annotated[KeysetParams, Depends(KeysetParams)]
+
+
+class KeysetPage(SchemaBase, Generic[T]):
+    """键集分页返回模型"""
+
+    items: Sequence[T]
+    next: int | None = None
+    total: int | None = None
+
+
+async def keyset_paging_data(
+    db: AsyncSession,
+    se: Select,
+    id_column: InstrumentedAttribute,
+    page_data_schema: type[SchemaT],
+    params: KeysetParams,
+) -> dict[str, Any]:
+    """
+    执行键集分页查询
+
+    :param db: 数据库会话对象
+    :param se: 不包含排序和分页的查询语句
+    :param id_column: 分页所依据的主键列
+    :param page_data_schema: 返回数据的 pydantic 模型
+    :param params: 分页参数
+    :return:
+    """
+    total = None
+    if params.with_total:
+        total = await db.scalar(
+            select(func.count())
+            .select_from(se.order_by(None).subquery())
+            .execution_options(**se.get_execution_options())
+        )
+    stmt = se.order_by(None).order_by(id_column.asc())
+    if params.after is not None:
+        stmt = stmt.where(id_column > params.after)
+    # 多取一条判断是否存在下一页
+    result = await db.execute(stmt.limit(params.size + 1))
+    rows = result.scalars().all()
+    has_next = len(rows) > params.size
+    rows = rows[: params.size]
+    items = [page_data_schema.model_validate(row) for row in rows]
+    page = KeysetPage[page_data_schema](
+        items=items, next=rows[-1].id if has_next else None, total=total
+    )
+    return page.model_dump()
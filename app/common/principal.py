@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+认证主体缓存
+
+JWT 认证只需要用户、部门、角色的状态以及角色和菜单 id，这里将它们保存为一个紧凑的快照，
+按 本地 LRU -> redis hash -> 数据库 的顺序读取，用户、角色、部门、菜单发生写操作时失效
+"""
+import json
+
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException, status
+
+from app.common.cache import CacheStats, SingleFlight, cache_stats
+from app.common.local_cache import TTLCache
+from app.common.redis import redis_client
+from app.core.conf import settings
+
+
+class UserPrincipal:
+    """认证主体快照"""
+
+    __slots__ = (
+        'id',
+        'uuid',
+        'username',
+        'nickname',
+        'status',
+        'is_superuser',
+        'is_staff',
+        'is_multi_login',
+        'dept_id',
+        'dept_status',
+        'dept_del_flag',
+        'role_ids',
+        'role_status',
+        'menu_ids',
+    )
+
+    def __init__(self, *values: Any):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def from_user(cls, user) -> 'UserPrincipal':
+        """由带有 dept 和 roles(menus) 关系的 User 实例构建"""
+        roles = user.roles or []
+        menu_ids = {menu.id for role in roles if role.status for menu in role.menus}
+        return cls(
+            user.id,
+            user.uuid,
+            user.username,
+            user.nickname,
+            user.status,
+            user.is_superuser,
+            user.is_staff,
+            user.is_multi_login,
+            user.dept_id,
+            user.dept.status if user.dept else None,
+            user.dept.del_flag if user.dept else None,
+            tuple(role.id for role in roles),
+            tuple(role.status for role in roles),
+            tuple(sorted(menu_ids)),
+        )
+
+    def dumps(self) -> str:
+        return json.dumps([getattr(self, name) for name in self.__slots__], ensure_ascii=False)
+
+    @classmethod
+    def loads(cls, data: str) -> 'UserPrincipal':
+        values = json.loads(data)
+        # tuple 字段在 json 中被保存为 list
+        for index in (11, 12, 13):
+            values[index] = tuple(values[index])
+        return cls(*values)
+
+    @property
+    def is_authenticated(self) -> bool:
+        return True
+
+    @property
+    def display_name(self) -> str:
+        return self.nickname
+
+    def check(self) -> None:
+        """校验用户、部门和角色状态"""
+        if not self.status:
+            raise HTTPException(status.HTTP_423_LOCKED, "用户已锁定")
+        if self.dept_id:
+            if not self.dept_status:
+                raise HTTPException(status.HTTP_423_LOCKED, "用户所属部门已锁定")
+            if self.dept_del_flag:
+                raise HTTPException(status.HTTP_423_LOCKED, "用户所属部门已删除")
+        if self.role_ids and all(role_status == 0 for role_status in self.role_status):
+            raise HTTPException(status.HTTP_423_LOCKED, "用户所属角色已锁定")
+
+
+class PrincipalCache:
+    """认证主体两级缓存"""
+
+    def __init__(self):
+        self.local = TTLCache(settings.PRINCIPAL_CACHE_MAXSIZE)
+        self.stats = cache_stats.setdefault('principal', CacheStats())
+        self._flight = SingleFlight()
+        # 失效次数，加载期间发生过失效时不缓存加载结果，避免覆盖失效
+        self._generation = 0
+
+    async def get(self, user_id: int, loader: Callable[[int], Awaitable[UserPrincipal]]) -> UserPrincipal:
+        """
+        获取认证主体
+
+        :param user_id: 用户 id
+        :param loader: 缓存未命中时从数据库加载的函数
+        :return:
+        """
+        principal = self.local.get(user_id)
+        if principal is not None:
+            self.stats.local_hits += 1
+            return principal
+        # 同一用户的并发请求只读取一次 redis / 数据库
+        return await self._flight.do(user_id, lambda: self._load(user_id, loader))
+
+    async def _load(self, user_id: int, loader: Callable[[int], Awaitable[UserPrincipal]]) -> UserPrincipal:
+        generation = self._generation
+        data = await redis_client.hget(settings.PRINCIPAL_REDIS_KEY, str(user_id))
+        if data:
+            self.stats.hits += 1
+            principal = UserPrincipal.loads(data)
+        else:
+            self.stats.misses += 1
+            self.stats.loads += 1
+            principal = await loader(user_id)
+            if generation != self._generation:
+                return principal
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.hset(settings.PRINCIPAL_REDIS_KEY, str(user_id), principal.dumps())
+                pipe.expire(settings.PRINCIPAL_REDIS_KEY, settings.PRINCIPAL_EXPIRE_SECONDS)
+                await pipe.execute()
+        if generation == self._generation:
+            self.local.set(user_id, principal, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+        return principal
+
+    async def invalidate(self, user_id: int) -> None:
+        """用户写操作的事务提交后调用"""
+        self._generation += 1
+        await redis_client.hdel(settings.PRINCIPAL_REDIS_KEY, str(user_id))
+        self.local.pop(user_id)
+        await redis_client.publish(settings.PRINCIPAL_INVALIDATE_CHANNEL, str(user_id))
+
+    async def invalidate_all(self) -> None:
+        """角色、部门、菜单写操作的事务提交后调用，它们可能影响任意数量的用户"""
+        self._generation += 1
+        await redis_client.unlink(settings.PRINCIPAL_REDIS_KEY)
+        self.local.clear()
+        await redis_client.publish(settings.PRINCIPAL_INVALIDATE_CHANNEL, '*')
+
+    def on_message(self, message: str) -> None:
+        self._generation += 1
+        if message == '*':
+            self.local.clear()
+        else:
+            self.local.pop(int(message))
+
+    async def listener(self) -> None:
+        """订阅失效消息，在应用生命周期内作为后台任务运行"""
+        await redis_client.subscribe_forever(
+            settings.PRINCIPAL_INVALIDATE_CHANNEL, self.on_message, on_reset=self.local.clear
+        )
+
+
+principal_cache = PrincipalCache()
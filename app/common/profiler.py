@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求级 SQL 分析
+
+开启后记录每个请求执行的 SQL 指纹、次数和耗时，同一指纹重复执行达到阈值时视为 N+1 查询；
+开关保存在 redis 中并通过 pub/sub 同步到所有进程，关闭时每条 SQL 只多一次 contextvar 读取
+"""
+import asyncio
+import re
+
+from contextvars import ContextVar
+from functools import lru_cache
+
+from app.common.log import logger as log
+from app.common.redis import redis_client
+from app.core.conf import settings
+
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'\(\s*(?:%s|\?|:\w+)(?:\s*,\s*(?:%s|\?|:\w+))+\s*\)')
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(statement: str) -> str:
+    """SQL 指纹：合并空白字符，IN 列表折叠为 (...)"""
+    return _IN_LIST.sub('(...)', _WHITESPACE.sub(' ', statement).strip())
+
+
+class QueryProfile:
+    """单个请求的 SQL 统计"""
+
+    __slots__ = ('queries', 'duration', 'fingerprints')
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+        # 指纹 -> [次数, 耗时]
+        self.fingerprints: dict[str, list] = {}
+
+    def record(self, statement: str, duration: float) -> None:
+        self.queries += 1
+        self.duration += duration
+        stats = self.fingerprints.get(statement)
+        if stats is None:
+            self.fingerprints[statement] = [1, duration]
+        else:
+            stats[0] += 1
+            stats[1] += duration
+
+    def repeated(self) -> list[tuple[str, int, float]]:
+        """疑似 N+1 的查询"""
+        result: dict[str, tuple[int, float]] = {}
+        for statement, (count, duration) in self.fingerprints.items():
+            key = fingerprint(statement)
+            previous = result.get(key, (0, 0.0))
+            result[key] = (previous[0] + count, previous[1] + duration)
+        return [
+            (key, count, duration)
+            for key, (count, duration) in result.items()
+            if count >= settings.DB_PROFILER_N1_THRESHOLD
+        ]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.3f};desc="{self.queries} queries"'
+
+    def summary(self, method: str, path: str) -> str:
+        top = sorted(self.fingerprints.items(), key=lambda item: item[1][1], reverse=True)[:3]
+        lines = [f'SQL 分析 {method} {path}: {self.queries} 条, {self.duration * 1000:.3f} ms']
+        lines.extend(f'  {count} 次 {duration * 1000:.3f} ms: {fingerprint(s)}' for s, (count, duration) in top)
+        return '\n'.join(lines)
+
+
+# 由 QueryProfilerMiddleware 在开启分析时设置
+query_profile: ContextVar[QueryProfile | None] = ContextVar('query_profile', default=None)
+
+
+def profile_query(statement: str, duration: float) -> None:
+    """记录一条 SQL，由 SQLAlchemy 事件调用"""
+    profile = query_profile.get()
+    if profile is not None:
+        profile.record(statement, duration)
+
+
+class QueryProfiler:
+    """分析开关"""
+
+    def __init__(self):
+        self.enabled = settings.DB_PROFILER_ENABLED
+
+    async def set_enabled(self, enabled: bool) -> None:
+        """修改开关并通知所有进程"""
+        value = '1' if enabled else '0'
+        await redis_client.set(settings.DB_PROFILER_REDIS_KEY, value)
+        self.enabled = enabled
+        await redis_client.publish(settings.DB_PROFILER_CHANNEL, value)
+
+    async def load(self) -> None:
+        value = await redis_client.get(settings.DB_PROFILER_REDIS_KEY)
+        if value is not None:
+            self.enabled = value == '1'
+
+    def on_message(self, message: str) -> None:
+        self.enabled = message == '1'
+        log.info(f'SQL 分析已{"开启" if self.enabled else "关闭"}')
+
+    def on_reset(self) -> None:
+        # 订阅中断期间可能错过开关消息，重新读取
+        asyncio.create_task(self.load())
+
+    async def listener(self) -> None:
+        await redis_client.subscribe_forever(settings.DB_PROFILER_CHANNEL, self.on_message, self.on_reset)
+
+
+query_profiler = QueryProfiler()
@@ -1,12 +1,32 @@
 """
 Redis 客户类，负责从 Redis 服务器中查询和插入 token
 """
+import asyncio
 import sys
+import time
+from typing import Callable
 from redis.asyncio.client import Redis
 from redis.exceptions import AuthorizationError, TimeoutError
 from app.common.log import logger as log
+from app.common.metrics import redis_command_duration
 from app.core.conf import settings
 
+# 写入 key 并登记到索引，索引的过期时间设为其中最晚过期成员的过期时间，
+# 同一索引中的 key 过期时间可能不同，不能简单地用本次写入的过期时间覆盖
+# KEYS[1]: key，KEYS[2]: 索引，KEYS[3]: 可选的条件 key；ARGV[1]: 过期时间（秒），ARGV[2]: 值，ARGV[3]: 当前时间戳，
+# ARGV[4]: 条件 key 的期望值（不存在视为 '0'），不一致时不写入并返回 0
+SET_INDEXED_SCRIPT = """
+if #KEYS > 2 and (redis.call('GET', KEYS[3]) or '0') ~= ARGV[4] then
+    return 0
+end
+redis.call('SETEX', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[3])
+redis.call('ZADD', KEYS[2], tonumber(ARGV[3]) + tonumber(ARGV[1]), KEYS[1])
+local last = redis.call('ZRANGE', KEYS[2], -1, -1, 'WITHSCORES')
+redis.call('EXPIREAT', KEYS[2], math.ceil(tonumber(last[2])))
+return 1
+"""
+
 
 class RedisClient(Redis):
     """
@@ -21,6 +41,15 @@ class RedisClient(Redis):
             socket_timeout=settings.REDIS_TIMEOUT,
             decode_responses=True,  # 自动将从Redis服务器接收到的响应解码为字符串 utf-8。
         )
+        self._set_indexed_script = self.register_script(SET_INDEXED_SCRIPT)
+
+    async def execute_command(self, *args, **options):
+        """记录命令耗时，pipeline 不经过此方法"""
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            redis_command_duration.observe(time.perf_counter() - start, str(args[0]).upper())
 
     async def is_connected(self) -> None:
         """
@@ -57,6 +86,96 @@ class RedisClient(Redis):
         for key in keys:
             await self.delete(key)
 
+    async def set_indexed(
+        self, index: str, key: str, value: str, ex: int, *, guard: tuple[str, str] | None = None
+    ) -> bool:
+        """
+        写入带过期时间的 key，并将其登记到索引中
+
+        索引为以过期时间戳为分值的有序集合，每次写入时顺带清除已过期的成员，
+        索引的过期时间为其中最晚过期的 key 的过期时间，整个过程在一个 Lua 脚本中原子执行
+
+        :param index: 索引的 key
+        :param key: 要写入的 key
+        :param value: 要写入的值
+        :param ex: 过期时间，单位：秒
+        :param guard: (条件 key, 期望值)，条件 key 的值（不存在视为 '0'）与期望值不一致时不写入
+        :return: 是否写入
+        """
+        keys = [key, index]
+        args = [ex, value, time.time()]
+        if guard is not None:
+            keys.append(guard[0])
+            args.append(guard[1])
+        return bool(await self._set_indexed_script(keys=keys, args=args))
+
+    async def delete_indexed(self, index: str, key: str) -> None:
+        """
+        删除单个 key 并从索引中移除
+
+        :param index: 索引的 key
+        :param key: 要删除的 key
+        :return:
+        """
+        async with self.pipeline(transaction=True) as pipe:
+            pipe.unlink(key)
+            pipe.zrem(index, key)
+            await pipe.execute()
+
+    async def delete_index(self, index: str, exclude: str | list = None, batch_size: int = 500) -> int:
+        """
+        删除索引中登记的所有未过期 key（不在 exclude 中的），代价与索引大小相关，与键空间总大小无关
+
+        :param index: 索引的 key
+        :param exclude: 要排除的key，可以是单个字符串或字符串列表，默认为None
+        :param batch_size: 每条 UNLINK 命令携带的 key 数量
+        :return: 删除的 key 数量
+        """
+        now = time.time()
+        members = await self.zrangebyscore(index, now, '+inf')
+        if isinstance(exclude, str):
+            exclude = [exclude]
+        keys = [key for key in members if key not in exclude] if exclude else list(members)
+        async with self.pipeline(transaction=False) as pipe:
+            for i in range(0, len(keys), batch_size):
+                pipe.unlink(*keys[i : i + batch_size])
+            if exclude:
+                pipe.zremrangebyscore(index, '-inf', now)
+                if keys:
+                    pipe.zrem(index, *keys)
+            else:
+                pipe.delete(index)
+            await pipe.execute()
+        return len(keys)
+
+    async def subscribe_forever(
+        self, channel: str, handler: Callable[[str], None], on_reset: Callable[[], None] | None = None
+    ) -> None:
+        """
+        持续订阅频道并处理消息，连接中断后自动重新订阅，需要作为后台任务运行
+
+        :param channel: 频道名称
+        :param handler: 消息处理函数
+        :param on_reset: 每次（重新）订阅时调用，订阅中断期间可能错过消息，可在此清除本地缓存
+        :return:
+        """
+        while True:
+            pubsub = self.pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                if on_reset:
+                    on_reset()
+                async for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        handler(message['data'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error('频道 {} 订阅异常，错误信息：{}', channel, e)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
 
 redis_client = RedisClient()
 
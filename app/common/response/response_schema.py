@@ -1,17 +1,19 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from datetime import datetime
-from typing import Any
+from typing import Any, AsyncIterable, Iterable
 
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, ConfigDict
 
 from .response_code import CustomResponse, CustomResponseCode
 from ...core.conf import settings
+from ...utils.serializers import json_dumps
 
 _ExcludeData = set[int | str] | dict[int | str, Any]
 
-__all__ = ['ResponseModel', 'response_base']
+__all__ = ['ResponseModel', 'FastJSONResponse', 'response_base']
 
 
 class ResponseModel(BaseModel):
@@ -47,6 +49,25 @@ class ResponseModel(BaseModel):
     msg: str = CustomResponseCode.HTTP_200.msg
     data: Any | None = None
 
+
+class FastJSONResponse(Response):
+    """
+    一次性编码为 JSON bytes 的响应类，跳过 jsonable_encoder
+
+    datetime 按 settings.DATETIME_FORMAT 格式化，优先使用 orjson
+    """
+
+    media_type = 'application/json'
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+def _envelope_prefix(res: CustomResponseCode | CustomResponse) -> bytes:
+    """返回 {"code":...,"msg":...,"data": 部分"""
+    return json_dumps({'code': res.code, 'msg': res.msg})[:-1] + b',"data":'
+
+
 class ResponseBase:
     """
     统一返回方法
@@ -54,7 +75,9 @@ class ResponseBase:
     .. tip::
 
         此类中的返回方法将通过自定义编码器预解析，然后由 fastapi 内部的编码器再次处理并返回，可能存在性能损耗，取决于个人喜好；
-        此返回模型不会生成 openapi schema 文档
+        此返回模型不会生成 openapi schema 文档；
+        对于大列表等对性能敏感的接口，可以使用 fast_success，响应只编码一次；
+        数量不定的大数组可以使用 stream_success 边读边发送
 
     E.g. ::
 
@@ -108,5 +131,76 @@ class ResponseBase:
     ) -> dict:
         return await self.__response(res=res, data=data, exclude=exclude, **kwargs)
 
+    @staticmethod
+    def fast_success(
+        *,
+        res: CustomResponseCode | CustomResponse = CustomResponseCode.HTTP_200,
+        data: Any | None = None,
+    ) -> FastJSONResponse:
+        """
+        快速返回方法，统一返回结构只编码一次，不支持 exclude
+
+        数据通过 json_dumps 编码，datetime 与 success 一样按 settings.DATETIME_FORMAT 格式化
+
+        E.g. ::
+
+            @router.get('/test')
+            async def test():
+                return response_base.fast_success(data=page_data)
+
+        :param res: 返回状态码
+        :param data: 返回数据
+        :return:
+        """
+        return FastJSONResponse({'code': res.code, 'msg': res.msg, 'data': data})
+
+    @staticmethod
+    def stream_success(
+        items: Iterable[Any] | AsyncIterable[Any],
+        *,
+        res: CustomResponseCode | CustomResponse = CustomResponseCode.HTTP_200,
+        chunk_size: int = 500,
+    ) -> StreamingResponse:
+        """
+        流式返回大数组，data 为 items 组成的数组，每 chunk_size 个元素编码并发送一次
+
+        元素通过 json_dumps 编码，与 fast_success 格式一致；响应头发送后出现的异常无法再返回错误码
+
+        :param items: 数组元素，支持同步和异步迭代器
+        :param res: 返回状态码
+        :param chunk_size: 每次发送的元素数量
+        :return:
+        """
+
+        async def body():
+            yield _envelope_prefix(res) + b'['
+            chunk: list[bytes] = []
+            first = True
+
+            def flush() -> bytes:
+                nonlocal first
+                data = b','.join(chunk)
+                if not first:
+                    data = b',' + data
+                first = False
+                chunk.clear()
+                return data
+
+            if hasattr(items, '__aiter__'):
+                async for item in items:
+                    chunk.append(json_dumps(item))
+                    if len(chunk) >= chunk_size:
+                        yield flush()
+            else:
+                for item in items:
+                    chunk.append(json_dumps(item))
+                    if len(chunk) >= chunk_size:
+                        yield flush()
+            if chunk:
+                yield flush()
+            yield b']}'
+
+        return StreamingResponse(body(), media_type='application/json')
+
 
 response_base = ResponseBase()
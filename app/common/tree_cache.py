@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+树形结构缓存
+
+菜单、部门很少修改但每次加载页面都会读取，构造好的树按 (类型, 过滤条件) 缓存在 redis 和本地，
+按 本地 -> redis -> 数据库 的顺序读取，菜单、部门写操作时整类失效，并通过 redis pub/sub 通知所有进程；
+redis 中按类型保存失效次数，加载期间发生失效（包括其它进程的失效）时，加载结果不写入 redis
+"""
+import json
+
+from typing import Any, Awaitable, Callable
+
+from app.common.cache import CacheStats, SingleFlight, cache_stats
+from app.common.local_cache import TTLCache
+from app.common.redis import redis_client
+from app.core.conf import settings
+from app.utils.serializers import json_dumps
+
+Tree = list[dict[str, Any]]
+
+
+class TreeCache:
+    """树形结构两级缓存"""
+
+    def __init__(self):
+        self.local = TTLCache(settings.TREE_CACHE_MAXSIZE)
+        self.stats = cache_stats.setdefault('tree', CacheStats())
+        self._flight = SingleFlight()
+        # 类型 -> 失效次数，用于丢弃失效前开始加载的结果
+        self._generation: dict[str, int] = {}
+
+    @staticmethod
+    def _key(tree_type: str, key: str) -> str:
+        return f'{settings.TREE_REDIS_PREFIX}:{tree_type}:{key}'
+
+    @staticmethod
+    def _index(tree_type: str) -> str:
+        return f'{settings.TREE_INDEX_REDIS_PREFIX}:{tree_type}'
+
+    @staticmethod
+    def _generation_key(tree_type: str) -> str:
+        return f'{settings.TREE_REDIS_PREFIX}_generation:{tree_type}'
+
+    async def get(self, tree_type: str, key: str, loader: Callable[[], Awaitable[Tree]]) -> Tree:
+        """
+        获取树，返回的树为共享对象，不要修改
+
+        :param tree_type: 类型，E.g. menu, dept
+        :param key: 过滤条件
+        :param loader: 缓存未命中时从数据库构造树的函数
+        :return:
+        """
+        tree = self.local.get((tree_type, key))
+        if tree is not None:
+            self.stats.local_hits += 1
+            return tree
+        return await self._flight.do((tree_type, key), lambda: self._load(tree_type, key, loader))
+
+    async def _load(self, tree_type: str, key: str, loader: Callable[[], Awaitable[Tree]]) -> Tree:
+        generation = self._generation.get(tree_type, 0)
+        data = await redis_client.get(self._key(tree_type, key))
+        if data:
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+            self.stats.loads += 1
+            # 在读取数据库之前取得失效次数，写入时不一致说明读取到的可能是失效前的数据
+            redis_generation = await redis_client.get(self._generation_key(tree_type)) or '0'
+            data = json_dumps(await loader()).decode('utf-8')
+            if generation == self._generation.get(tree_type, 0):
+                await redis_client.set_indexed(
+                    self._index(tree_type),
+                    self._key(tree_type, key),
+                    data,
+                    settings.TREE_EXPIRE_SECONDS,
+                    guard=(self._generation_key(tree_type), redis_generation),
+                )
+        # 统一使用 json 反序列化后的结果，本地缓存与 redis 中的数据一致
+        tree = json.loads(data)
+        if generation == self._generation.get(tree_type, 0):
+            self.local.set((tree_type, key), tree, settings.TREE_CACHE_TTL_SECONDS)
+        return tree
+
+    async def invalidate(self, tree_type: str) -> None:
+        """菜单、部门写操作的事务提交后调用，提交前失效会让并发读取重新缓存旧数据"""
+        # 先递增失效次数再删除，正在加载的旧数据要么写入后被删除，要么因失效次数不一致而不写入
+        await redis_client.incr(self._generation_key(tree_type))
+        await redis_client.delete_index(self._index(tree_type))
+        self.on_message(tree_type)
+        await redis_client.publish(settings.TREE_INVALIDATE_CHANNEL, tree_type)
+
+    def on_message(self, tree_type: str) -> None:
+        self._generation[tree_type] = self._generation.get(tree_type, 0) + 1
+        self.local.pop_where(lambda key, _: key[0] == tree_type)
+
+    async def listener(self) -> None:
+        """订阅失效消息，在应用生命周期内作为后台任务运行"""
+        await redis_client.subscribe_forever(
+            settings.TREE_INVALIDATE_CHANNEL, self.on_message, on_reset=self.local.clear
+        )
+
+
+tree_cache = TreeCache()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import celery
+
+from app.core.conf import settings
+
+__all__ = ['celery_app']
+
+
+def init_celery() -> celery.Celery:
+    """创建 celery 应用"""
+    app = celery.Celery('fba_celery')
+
+    _redis_broker = (
+        f'redis://:{settings.CELERY_REDIS_PASSWORD}@{settings.CELERY_REDIS_HOST}:'
+        f'{settings.CELERY_REDIS_PORT}/{settings.CELERY_BROKER_REDIS_DATABASE}'
+    )
+    _amqp_broker = (
+        f'amqp://{settings.RABBITMQ_USERNAME}:{settings.RABBITMQ_PASSWORD}@'
+        f'{settings.RABBITMQ_HOST}:{settings.RABBITMQ_PORT}'
+    )
+    _result_backend = (
+        f'redis://:{settings.CELERY_REDIS_PASSWORD}@{settings.CELERY_REDIS_HOST}:'
+        f'{settings.CELERY_REDIS_PORT}/{settings.CELERY_BACKEND_REDIS_DATABASE}'
+    )
+
+    app.conf.broker_url = _redis_broker if settings.CELERY_BROKER == 'redis' else _amqp_broker
+    app.conf.result_backend = _result_backend
+    app.conf.result_backend_transport_options = {
+        'global_keyprefix': settings.CELERY_BACKEND_REDIS_PREFIX,
+        'retry_policy': {'timeout': settings.CELERY_BACKEND_REDIS_TIMEOUT},
+        'result_chord_ordered': settings.CELERY_BACKEND_REDIS_ORDERED,
+    }
+    app.conf.timezone = settings.DATETIME_TIMEZONE
+    app.conf.beat_schedule = settings.CELERY_BEAT_SCHEDULE
+    app.conf.beat_schedule_filename = settings.CELERY_BEAT_SCHEDULE_FILENAME
+    app.conf.imports = ('app.tasks',)
+
+    return app
+
+
+celery_app = init_celery()
@@ -109,6 +109,14 @@ class Settings(BaseSettings):
     DB_ECHO: bool = False
     DB_DATABASE: str = 'fba'
     DB_CHARSET: str = 'utf8mb4'
+    # 连接池，单个进程最多占用 DB_POOL_SIZE + DB_MAX_OVERFLOW 个连接，多进程部署时注意不要超过 MySQL max_connections
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_RECYCLE: int = 60 * 60  # 连接回收时间，单位：秒
+    DB_POOL_TIMEOUT: float = 30.0  # 等待可用连接的超时时间，单位：秒
+    # 只读副本，格式 ['host:port', ...]，与主库使用相同的用户、密码和数据库；为空时所有查询走主库
+    DB_REPLICA_HOSTS: list[str] = []
+    DB_REPLICA_RETRY_SECONDS: int = 30  # 副本连接失败后暂停使用的时间，单位：秒
 
     # Redis
     REDIS_TIMEOUT: int = 5
@@ -120,12 +128,38 @@ class Settings(BaseSettings):
     TOKEN_URL_SWAGGER: str = f'{API_V1_STR}/auth/swagger_login'
     TOKEN_REDIS_PREFIX: str = 'fba_token'
     TOKEN_REFRESH_REDIS_PREFIX: str = 'fba_refresh_token'
+    # 记录每个用户 token key 的有序集合（按过期时间），注销时无需 SCAN 整个键空间
+    TOKEN_INDEX_REDIS_PREFIX: str = 'fba_token_index'
+    TOKEN_REFRESH_INDEX_REDIS_PREFIX: str = 'fba_refresh_token_index'
+    # 进程内已验证 token 缓存，注销通过 redis pub/sub 广播到所有进程
+    TOKEN_CACHE_MAXSIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 60  # 缓存时间上限，单位：秒，同时受 token 自身过期时间限制
+    TOKEN_REVOKE_CHANNEL: str = 'fba_token_revoke'
     TOKEN_EXCLUDE: list[str] = [  # 白名单
         f'{API_V1_STR}/openapi',
         f'{API_V1_STR}/auth/login',
         f'{API_V1_STR}/auth/swagger_login'
     ]
 
+    # Password: bcrypt 哈希使用独立的线程池，避免登录高峰占满默认线程池
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32  # 排队中的哈希任务上限，超过时返回 429
+
+    # Principal: JWT 认证使用的用户状态快照缓存
+    PRINCIPAL_REDIS_KEY: str = 'fba_principal'
+    PRINCIPAL_EXPIRE_SECONDS: int = 60 * 60 * 24 * 1  # 过期时间，单位：秒
+    PRINCIPAL_CACHE_MAXSIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60  # 本地缓存时间，单位：秒
+    PRINCIPAL_INVALIDATE_CHANNEL: str = 'fba_principal_invalidate'
+
+    # Tree: 菜单、部门树形结构缓存
+    TREE_REDIS_PREFIX: str = 'fba_tree'
+    TREE_INDEX_REDIS_PREFIX: str = 'fba_tree_index'  # 按类型登记树缓存 key 的索引集合
+    TREE_EXPIRE_SECONDS: int = 60 * 60 * 24 * 1  # 过期时间，单位：秒
+    TREE_CACHE_MAXSIZE: int = 256
+    TREE_CACHE_TTL_SECONDS: int = 300  # 本地缓存时间，单位：秒
+    TREE_INVALIDATE_CHANNEL: str = 'fba_tree_invalidate'
+
     # Captcha
     CAPTCHA_LOGIN_REDIS_PREFIX: str = 'fba_login_captcha'
     CAPTCHA_LOGIN_EXPIRE_SECONDS: int = 60 * 5  # 过期时间，单位：秒
@@ -138,6 +172,22 @@ class Settings(BaseSettings):
     MIDDLEWARE_CORS: bool = True
     MIDDLEWARE_GZIP: bool = True
     MIDDLEWARE_ACCESS: bool = True
+    MIDDLEWARE_ACCESS_SAMPLE_RATE: float = 1.0  # 访问日志采样率，0 ~ 1
+    MIDDLEWARE_ACCESS_SLOW_MS: float = 1000.0  # 超过该耗时的请求始终记录，单位：毫秒
+    MIDDLEWARE_METRICS: bool = True
+    MIDDLEWARE_OPERA_LOG: bool = True  # 操作日志，同时是请求统计（/monitors/requests）的数据来源
+
+    # DB profiler: 请求级 SQL 分析，可通过接口在运行时开关
+    DB_PROFILER_ENABLED: bool = False  # 启动时的默认值，redis 中保存的开关优先
+    DB_PROFILER_N1_THRESHOLD: int = 5  # 同一 SQL 在一个请求中执行达到该次数时视为 N+1 查询
+    DB_PROFILER_REDIS_KEY: str = 'fba_db_profiler'
+    DB_PROFILER_CHANNEL: str = 'fba_db_profiler'
+
+    # Monitor: 服务器、redis 状态后台采样
+    MONITOR_SAMPLE_INTERVAL: float = 5.0  # 采样间隔，单位：秒
+    MONITOR_HISTORY_SIZE: int = 720  # 保留的历史采样数量
+    # 允许抓取 Prometheus 指标的客户端 IP，为空时关闭该接口；经反向代理访问时需填写代理的 IP
+    MONITOR_METRICS_ALLOW_HOSTS: list[str] = ['127.0.0.1', '::1']
 
     # Casbin
     CASBIN_RBAC_MODEL_NAME: str = 'rbac_model.conf'
@@ -174,10 +224,42 @@ class Settings(BaseSettings):
         'new_password',
         'confirm_password',
     ]
+    # 请求体采集：只保留白名单内容类型且不超过大小上限的请求体，其余只记录大小和前若干字节的 sha256
+    OPERA_LOG_BODY_MAX_SIZE: int = 64 * 1024  # 单位：字节
+    OPERA_LOG_BODY_CONTENT_TYPES: list[str] = [
+        'application/json',
+        'application/x-www-form-urlencoded',
+        'multipart/form-data',  # 只记录字段和文件名，超过大小上限的上传同样只记录摘要
+    ]
+    OPERA_LOG_BODY_HASH_BYTES: int = 64 * 1024  # 单位：字节
+    # 操作日志先写入内存队列，由后台任务按批次写入数据库
+    OPERA_LOG_QUEUE_MAXSIZE: int = 10000
+    OPERA_LOG_QUEUE_OVERFLOW: Literal['drop', 'block'] = 'drop'  # 队列满时丢弃日志或等待
+    OPERA_LOG_BATCH_SIZE: int = 200  # 每批最多写入的日志条数
+    OPERA_LOG_FLUSH_INTERVAL: float = 0.5  # 批次最长等待时间，单位：秒
+
+    # Log retention: 操作日志、登录日志按月分区，定时删除过期分区
+    LOG_RETENTION_MONTHS: int = 6  # 保留最近几个月的日志（含当月）
+    LOG_PARTITION_PRECREATE_MONTHS: int = 3  # 提前创建未来几个月的分区
+    LOG_DELETE_CHUNK_SIZE: int = 1000  # 按 id 删除时每个事务删除的条数
+
+    # Request rollup: 由操作日志聚合的请求统计
+    REQUEST_ROLLUP_SKETCH_ACCURACY: float = 0.01  # 耗时分位数的相对误差
+    REQUEST_ROLLUP_MINUTE_RETENTION_DAYS: int = 7  # 分钟级统计保留天数，小时级统计长期保留
 
     # Ip location
     IP_LOCATION_REDIS_PREFIX: str = 'fba_ip_location'
     IP_LOCATION_EXPIRE_SECONDS: int = 60 * 60 * 24 * 1  # 过期时间，单位：秒
+    IP_LOCATION_CACHE_MAXSIZE: int = 10000  # 进程内缓存数量
+    IP_LOCATION_CACHE_TTL_SECONDS: int = 60 * 60  # 进程内缓存时间，单位：秒
+    IP_LOCATION_STALE_SECONDS: int = 60 * 60  # 过期后仍返回旧值并在后台刷新的时间，单位：秒
+    IP_LOCATION_LOCK_TIMEOUT: float = 3.0  # 多进程同时解析同一 ip 时的加载锁超时时间，单位：秒
+    # 在线解析
+    IP_LOCATION_ONLINE_TIMEOUT: float = 3.0  # 请求超时时间，单位：秒
+    IP_LOCATION_ONLINE_MAX_CONNECTIONS: int = 20  # 最大并发连接数
+    IP_LOCATION_ONLINE_NEGATIVE_TTL_SECONDS: int = 60  # 查询失败的 ip 在此时间内直接使用离线解析，单位：秒
+    IP_LOCATION_ONLINE_BREAKER_THRESHOLD: int = 5  # 连续失败次数达到该值后熔断，改用离线解析
+    IP_LOCATION_ONLINE_BREAKER_SECONDS: int = 30  # 熔断时间，单位：秒
 
     # Celery
     CELERY_BROKER: Literal['rabbitmq', 'redis'] = 'redis'
@@ -190,6 +272,10 @@ class Settings(BaseSettings):
             'task': 'tasks.task_demo_async',
             'schedule': 5.0,
         },
+        'log_retention': {
+            'task': 'tasks.log_retention',
+            'schedule': 60 * 60 * 24,
+        },
     }
 
     @model_validator(mode='before')
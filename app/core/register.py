@@ -1,4 +1,5 @@
 """FastAPI 资源注册"""
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import Depends, FastAPI
 from fastapi_limiter import FastAPILimiter
@@ -10,7 +11,14 @@ from app.core.conf import settings
 from app.database.db_mysql import create_table
 from app.middlewares.auth_middleware import JWTAuthMiddleware
 from app.middlewares.opera_log_middleware import OperaLogMiddleware
+from app.common.profiler import query_profiler
+from app.services.monitor_service import status_sampler
+from app.services.opera_log_service import opera_log_queue
+from app.common.principal import principal_cache
+from app.common.tree_cache import tree_cache
+from app.utils.auth_helper import password_executor, token_revoke_listener
 from app.utils.demo_site import demo_site
+from app.utils.request_parse import close_http_client
 from app.utils.health_check import ensure_unique_route_names, http_limit_callback
 from app.utils.openapi import simplify_operation_ids
 
@@ -33,9 +41,34 @@ async def register_init(app: FastAPI):
         prefix=settings.LIMITER_REDIS_PREFIX,
         http_callback=http_limit_callback,
     )
+    # 订阅 token 注销消息
+    token_revoke_task = asyncio.create_task(token_revoke_listener())
+    # 订阅认证主体缓存失效消息
+    principal_task = asyncio.create_task(principal_cache.listener())
+    # 订阅菜单、部门树缓存失效消息
+    tree_task = asyncio.create_task(tree_cache.listener())
+    # 同步 SQL 分析开关
+    profiler_task = asyncio.create_task(query_profiler.listener())
+    # 启动操作日志批量写入
+    opera_log_queue.start()
+    # 启动服务器状态采样
+    status_sampler.start()
 
     yield
 
+    await status_sampler.stop()
+    # 写入剩余的操作日志
+    await opera_log_queue.stop()
+    # 关闭 ip 属地在线解析客户端
+    await close_http_client()
+    # 关闭密码哈希线程池
+    password_executor.shutdown()
+
+    token_revoke_task.cancel()
+    principal_task.cancel()
+    tree_task.cancel()
+    profiler_task.cancel()
+
     # 关闭 redis 连接
     await redis_client.close()
     # 关闭 limiter
@@ -90,8 +123,9 @@ def register_middleware(app: FastAPI):
     # if settings.MIDDLEWARE_GZIP:
     #     from fastapi.middleware.gzip import GZipMiddleware
     #     app.add_middleware(GZipMiddleware)
-    # Opera log
-    # app.add_middleware(OperaLogMiddleware)
+    # Opera log: 日志由后台队列批量写入，并累加到请求统计
+    if settings.MIDDLEWARE_OPERA_LOG:
+        app.add_middleware(OperaLogMiddleware)
 
     # JWT auth, required
     # app.add_middleware(
@@ -103,11 +137,24 @@ def register_middleware(app: FastAPI):
     #     ),
     # )
 
+    # SQL 分析: 关闭时直接透传
+    from app.middlewares.query_profiler_middleware import QueryProfilerMiddleware
+    app.add_middleware(QueryProfilerMiddleware)
+
+    # DB session: 需要位于 JWT 认证和操作日志中间件之外，使其共享同一个请求级 session
+    from app.middlewares.db_session_middleware import DBSessionMiddleware
+    app.add_middleware(DBSessionMiddleware)
+
     # Access log
     if settings.MIDDLEWARE_ACCESS:
         from app.middlewares.access_middleware import AccessMiddleware
         app.add_middleware(AccessMiddleware)
 
+    # Metrics: 位于最外层，统计完整的请求耗时
+    if settings.MIDDLEWARE_METRICS:
+        from app.middlewares.metrics_middleware import MetricsMiddleware
+        app.add_middleware(MetricsMiddleware)
+
     # CORS: Always at the end
     # 关于 fastapi 跨域资源共享中间件参看 https://fastapi.tiangolo.com/zh/tutorial/cors/
     # if settings.MIDDLEWARE_CORS:
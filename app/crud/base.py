@@ -7,6 +7,7 @@ from sqlalchemy import and_, delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.base import MappedBase
+from ..database.db_mysql import READ_REPLICA
 
 ModelType = TypeVar('ModelType', bound=MappedBase)
 CreateSchemaType = TypeVar('CreateSchemaType', bound=BaseModel)
@@ -48,7 +49,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 assert del_flag in (0, 1), '查询错误, del_flag 参数只能为 0 或 1'
                 where_list.append(self.model.del_flag == del_flag)
 
-            result = await db.execute(select(self.model).where(and_(*where_list)))
+            result = await db.execute(select(self.model).where(and_(*where_list)).execution_options(**READ_REPLICA))
             return result.scalars().first()
 
     async def create_(self, db: AsyncSession, obj_in: CreateSchemaType, user_id: int | None = None) -> None:
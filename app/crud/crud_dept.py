@@ -6,9 +6,12 @@ from sqlalchemy import and_, asc, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from crud.base import CRUDBase
-from models import Dept, User
-from schemas.dept import CreateDept, UpdateDept
+from .base import CRUDBase
+from ..common.principal import principal_cache
+from ..common.tree_cache import tree_cache
+from ..database.db_mysql import after_commit
+from ..models import Dept, User
+from ..schemas.dept import CreateDept, UpdateDept
 
 
 class CRUDDept(CRUDBase[Dept, CreateDept, UpdateDept]):
@@ -46,12 +49,19 @@ class CRUDDept(CRUDBase[Dept, CreateDept, UpdateDept]):
 
     async def create(self, db: AsyncSession, obj_in: CreateDept) -> None:
         await self.create_(db, obj_in)
+        after_commit(db, lambda: tree_cache.invalidate('dept'))
 
     async def update(self, db: AsyncSession, dept_id: int, obj_in: UpdateDept) -> int:
-        return await self.update_(db, dept_id, obj_in)
+        count = await self.update_(db, dept_id, obj_in)
+        after_commit(db, principal_cache.invalidate_all)
+        after_commit(db, lambda: tree_cache.invalidate('dept'))
+        return count
 
     async def delete(self, db: AsyncSession, dept_id: int) -> int:
-        return await self.delete_(db, dept_id, del_flag=1)
+        count = await self.delete_(db, dept_id, del_flag=1)
+        after_commit(db, principal_cache.invalidate_all)
+        after_commit(db, lambda: tree_cache.invalidate('dept'))
+        return count
 
     async def get_user_relation(self, db: AsyncSession, dept_id: int) -> list[User]:
         result = await db.execute(
@@ -1,10 +1,20 @@
-from sqlalchemy import select, update, delete, and_
+from sqlalchemy import Select, select, update, delete, and_, or_, true, union
+from sqlalchemy.dialects.mysql import match
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .base import CRUDBase
-from ..models import FuzzTestCase
+from ..database.db_mysql import READ_REPLICA
+from ..models import FuzzTestCase, FuzzTestField, FuzzTestSuite
 from ..schemas.fuzz_test_case_schema import UpdateCaseSchema, CreateCaseSchema
 
+# MySQL ngram 全文解析器默认的 ngram_token_size，短于它的关键字无法命中全文索引
+NGRAM_TOKEN_SIZE = 2
+
+
+def _fulltext_phrase(keyword: str) -> str:
+    """将用户输入转换为布尔模式下的短语查询，去掉会被解析为操作符的双引号"""
+    return '"{}"'.format(keyword.replace('"', ' '))
+
 
 class CRUDFuzzTestCase(CRUDBase[CreateCaseSchema, CreateCaseSchema, UpdateCaseSchema]):
 
@@ -23,13 +33,99 @@ class CRUDFuzzTestCase(CRUDBase[CreateCaseSchema, CreateCaseSchema, UpdateCaseSc
         """
         case = await db.execute(select(FuzzTestCase).where(
             and_(FuzzTestCase.name == case_name, FuzzTestCase.suite_id == suite_id)
-        ))
+        ).execution_options(**READ_REPLICA))
         return case.scalars().first()
     
     async def read_cases(sel, db: AsyncSession, suite_id: int) -> list[FuzzTestCase]:
-        cases = await db.execute(select(FuzzTestCase).where(FuzzTestCase.suite_id == suite_id))
+        cases = await db.execute(select(FuzzTestCase).where(FuzzTestCase.suite_id == suite_id).execution_options(**READ_REPLICA))
         return cases.scalars().all()
         
+    async def get_list(self, user_id: int, suite_id: int, name: str | None = None) -> Select:
+        """
+        获取指定套件下的用例列表查询语句，仅包含系统套件或用户自己套件中的用例
+
+        :param user_id: 当前用户 id
+        :param suite_id: 套件 id
+        :param name: 名称前缀
+        :return:
+        """
+        where_list = [
+            FuzzTestCase.suite_id == suite_id,
+            or_(FuzzTestSuite.is_system == true(), FuzzTestSuite.user_id == user_id),
+        ]
+        if name:
+            where_list.append(FuzzTestCase.name.startswith(name, autoescape=True))
+        return select(FuzzTestCase).join(FuzzTestSuite, FuzzTestCase.suite_id == FuzzTestSuite.id).where(
+            and_(*where_list)
+        ).execution_options(**READ_REPLICA)
+
+    async def get_search(
+        self,
+        user_id: int,
+        *,
+        keyword: str | None = None,
+        suite_id: int | None = None,
+        field_type: str | None = None,
+        field_name: str | None = None,
+        default_contains: str | None = None,
+    ) -> Select:
+        """
+        检索测试用例查询语句
+
+        - keyword 通过全文索引匹配用例或所属套件的名称、描述，过短的关键字使用 LIKE 匹配
+        - field_* 条件作用于同一个字段，返回至少包含一个满足全部条件字段的用例
+
+        :param user_id: 当前用户 id
+        :param keyword: 用例/套件关键字
+        :param suite_id: 套件 id
+        :param field_type: 字段类型，匹配 type 列或 attribute 中的 type
+        :param field_name: 字段名称
+        :param default_contains: 字段默认值包含的内容
+        :return:
+        """
+        where_list = [or_(FuzzTestSuite.is_system == true(), FuzzTestSuite.user_id == user_id)]
+        if suite_id is not None:
+            where_list.append(FuzzTestCase.suite_id == suite_id)
+        stmt = select(FuzzTestCase).join(FuzzTestSuite, FuzzTestCase.suite_id == FuzzTestSuite.id)
+        if keyword and len(keyword) < NGRAM_TOKEN_SIZE:
+            # 短于 ngram_token_size 的关键字在全文索引中永远无法命中，退化为 LIKE 匹配
+            where_list.append(or_(
+                FuzzTestCase.name.contains(keyword, autoescape=True),
+                FuzzTestCase.description.contains(keyword, autoescape=True),
+                FuzzTestSuite.name.contains(keyword, autoescape=True),
+                FuzzTestSuite.description.contains(keyword, autoescape=True),
+            ))
+        elif keyword:
+            # 每个 MATCH 单独作为一个子查询，各自由对应的全文索引驱动，再 UNION 得到用例 id；
+            # 将多个 MATCH 用 OR 连接会使 MySQL 放弃全文索引
+            phrase = _fulltext_phrase(keyword)
+            keyword_ids = union(
+                select(FuzzTestCase.id).where(
+                    match(FuzzTestCase.name, FuzzTestCase.description, against=phrase).in_boolean_mode()
+                ),
+                select(FuzzTestCase.id).join(FuzzTestSuite, FuzzTestCase.suite_id == FuzzTestSuite.id).where(
+                    match(FuzzTestSuite.name, FuzzTestSuite.description, against=phrase).in_boolean_mode()
+                ),
+            ).subquery()
+            stmt = stmt.join(keyword_ids, FuzzTestCase.id == keyword_ids.c.id)
+        field_where = []
+        if field_type:
+            field_where.append(or_(FuzzTestField.type == field_type, FuzzTestField.attribute_type == field_type))
+        if field_name:
+            field_where.append(FuzzTestField.name == field_name)
+        if default_contains:
+            if len(default_contains) >= NGRAM_TOKEN_SIZE:
+                # 全文索引负责缩小范围，LIKE 保证子串匹配语义准确
+                field_where.append(
+                    match(FuzzTestField.default_value, against=_fulltext_phrase(default_contains)).in_boolean_mode()
+                )
+            field_where.append(FuzzTestField.default_value.contains(default_contains, autoescape=True))
+        if field_where:
+            # 先由字段表的索引得到用例 id，再与用例表连接，避免对每个用例执行一次相关子查询
+            field_case_ids = select(FuzzTestField.case_id).where(*field_where).distinct().subquery()
+            stmt = stmt.join(field_case_ids, FuzzTestCase.id == field_case_ids.c.case_id)
+        return stmt.where(and_(*where_list)).execution_options(**READ_REPLICA)
+
     async def update_case(
         self, db: AsyncSession, suite_id: int, old_name: str, new_name: str, new_desc: str = None
     ) -> int:
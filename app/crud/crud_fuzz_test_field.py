@@ -1,10 +1,11 @@
 
 from typing import Sequence
-from sqlalchemy import select, delete, update, and_
+from sqlalchemy import Select, select, delete, update, and_, or_, true
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .base import CRUDBase
-from ..models import FuzzTestField
+from ..database.db_mysql import READ_REPLICA
+from ..models import FuzzTestCase, FuzzTestField, FuzzTestSuite
 from ..schemas.fuzz_test_field_schema import CreateFieldSchema
 
 class CRUDFuzzTestField(CRUDBase[FuzzTestField, CreateFieldSchema, CreateFieldSchema]):
@@ -22,18 +23,48 @@ class CRUDFuzzTestField(CRUDBase[FuzzTestField, CreateFieldSchema, CreateFieldSc
         """TODO"""
         primitive = await db.execute(
             select(self.model).where(self.model.name == name and self.model.case_id == case_id)
+            .execution_options(**READ_REPLICA)
         )
         return primitive.scalars().first()
 
     async def read_fields(self, db: AsyncSession, case_id) -> Sequence[FuzzTestField]:
         fields = await db.execute(
-            select(self.model).where(self.model.case_id == case_id)
+            select(self.model).where(self.model.case_id == case_id).execution_options(**READ_REPLICA)
         )
         return fields.scalars().all()
     
+    async def get_list(
+        self, user_id: int, case_id: int, name: str | None = None, field_type: str | None = None
+    ) -> Select:
+        """
+        获取指定用例下的字段列表查询语句，仅包含系统套件或用户自己套件中的字段
+
+        :param user_id: 当前用户 id
+        :param case_id: 用例 id
+        :param name: 名称前缀
+        :param field_type: 字段类型
+        :return:
+        """
+        where_list = [
+            self.model.case_id == case_id,
+            or_(FuzzTestSuite.is_system == true(), FuzzTestSuite.user_id == user_id),
+        ]
+        if name:
+            where_list.append(self.model.name.startswith(name, autoescape=True))
+        if field_type:
+            where_list.append(self.model.type == field_type)
+        return (
+            select(self.model)
+            .join(FuzzTestCase, self.model.case_id == FuzzTestCase.id)
+            .join(FuzzTestSuite, FuzzTestCase.suite_id == FuzzTestSuite.id)
+            .where(and_(*where_list))
+            .execution_options(**READ_REPLICA)
+        )
+
     async def read_variable(self, db: AsyncSession, case_id, variable_name: str) -> FuzzTestField | None:
             primitive = await db.execute(
                 select(self.model).where(self.model.name == variable_name and self.model.case_id == case_id)
+                .execution_options(**READ_REPLICA)
             )
             return primitive.scalars().first()
 
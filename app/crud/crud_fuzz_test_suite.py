@@ -1,10 +1,13 @@
 from typing import Sequence
-from sqlalchemy import and_, asc, or_, select, insert, update, delete
+from sqlalchemy import Select, and_, asc, or_, select, insert, update, delete, false, func, literal, true
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from .base import CRUDBase
-from ..models import FuzzTestSuite
+from ..database.db_mysql import READ_REPLICA
+from ..models import FuzzTestCase, FuzzTestField, FuzzTestSuite
 
 from ..schemas.fuzz_test_suite_schema import UpdateSuiteSchema, SuiteSchema
+from ..utils.timezone import timezone
 
 
 class CRUDFuzzTestSuite(CRUDBase[FuzzTestSuite, SuiteSchema, UpdateSuiteSchema]):
@@ -16,23 +19,45 @@ class CRUDFuzzTestSuite(CRUDBase[FuzzTestSuite, SuiteSchema, UpdateSuiteSchema])
     async def read_suite(self, db: AsyncSession, user_id: int, suite_name: str) -> FuzzTestSuite | None:
             suite = await db.execute(
                 select(FuzzTestSuite).where(
-                    FuzzTestSuite.name == suite_name and FuzzTestSuite.user_id == user_id
-                )
+                    and_(FuzzTestSuite.name == suite_name, FuzzTestSuite.user_id == user_id)
+                ).execution_options(**READ_REPLICA)
             )
             return suite.scalars().first()
     
     async def read_user_suites(self, db: AsyncSession, user_id) -> Sequence[FuzzTestSuite]:
         groups = await db.execute(
             select(FuzzTestSuite).where(FuzzTestSuite.user_id == user_id).order_by(asc(FuzzTestSuite.id))
+            .execution_options(**READ_REPLICA)
         )
         return groups.scalars().all()
         
     async def read_system_suites(self, db: AsyncSession) -> Sequence[FuzzTestSuite]:
         groups = await db.execute(
                 select(FuzzTestSuite).where(FuzzTestSuite.is_system == True).order_by(asc(FuzzTestSuite.id))
+                .execution_options(**READ_REPLICA)
             )
         return groups.scalars().all()
 
+    async def get_list(self, user_id: int, name: str | None = None, is_system: bool | None = None) -> Select:
+        """
+        获取测试套件列表查询语句，is_system 为空时同时包含系统套件和用户自己的套件
+
+        :param user_id: 当前用户 id
+        :param name: 名称前缀
+        :param is_system: 是否为系统套件
+        :return:
+        """
+        where_list = []
+        if is_system is None:
+            where_list.append(or_(self.model.is_system == true(), self.model.user_id == user_id))
+        elif is_system:
+            where_list.append(self.model.is_system == true())
+        else:
+            where_list.append(and_(self.model.is_system == false(), self.model.user_id == user_id))
+        if name:
+            where_list.append(self.model.name.startswith(name, autoescape=True))
+        return select(self.model).where(and_(*where_list)).execution_options(**READ_REPLICA)
+
     async def create_suite(
         self, db, user_id, name, desc=None, is_user_saved=False, is_system=False
         ):
@@ -60,5 +85,62 @@ class CRUDFuzzTestSuite(CRUDBase[FuzzTestSuite, SuiteSchema, UpdateSuiteSchema])
         await db.commit()
         return result_proxy.rowcount
 
+    async def clone_suite(
+        self, db: AsyncSession, suite_id: int, user_id: int, name: str, desc: str | None = None
+    ) -> int | None:
+        """
+        在数据库内部复制一个测试套件及其全部用例和字段，生成属于 user_id 的用户套件
+
+        - 三条 INSERT ... SELECT 语句完成复制，数据行不会被加载到 Python 中
+        - 新用例的 id 通过 (suite_id, name) 与原用例关联，以此完成字段 case_id 的重映射
+        - 事务由调用方控制
+
+        :param db: 数据库会话对象
+        :param suite_id: 被复制的套件 id
+        :param user_id: 新套件所属用户 id
+        :param name: 新套件名称
+        :param desc: 新套件描述，为空时沿用原套件描述
+        :return: 新套件 id，原套件不存在时返回 None
+        """
+        now = timezone.now()
+        suite_result = await db.execute(
+            insert(FuzzTestSuite).from_select(
+                ['name', 'description', 'is_system', 'user_id', 'is_user_saved', 'created_time'],
+                select(
+                    literal(name),
+                    func.coalesce(literal(desc), FuzzTestSuite.description),
+                    false(),
+                    literal(user_id),
+                    true(),
+                    literal(now),
+                ).where(FuzzTestSuite.id == suite_id),
+            )
+        )
+        if not suite_result.rowcount:
+            return None
+        new_suite_id = suite_result.lastrowid
+
+        await db.execute(
+            insert(FuzzTestCase).from_select(
+                ['name', 'description', 'suite_id', 'created_time'],
+                select(
+                    FuzzTestCase.name, FuzzTestCase.description, literal(new_suite_id), literal(now)
+                ).where(FuzzTestCase.suite_id == suite_id),
+            )
+        )
+
+        src_case = aliased(FuzzTestCase)
+        new_case = aliased(FuzzTestCase)
+        await db.execute(
+            insert(FuzzTestField).from_select(
+                ['name', 'type', 'attribute', 'case_id', 'created_time'],
+                select(FuzzTestField.name, FuzzTestField.type, FuzzTestField.attribute, new_case.id, literal(now))
+                .join(src_case, FuzzTestField.case_id == src_case.id)
+                .join(new_case, and_(new_case.suite_id == new_suite_id, new_case.name == src_case.name))
+                .where(src_case.suite_id == suite_id),
+            )
+        )
+        return new_suite_id
+
 
 FUZZTESTSUITEDAO = CRUDFuzzTestSuite(FuzzTestSuite)
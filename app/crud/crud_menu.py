@@ -5,9 +5,12 @@ from typing import Sequence
 from sqlalchemy import and_, asc, select
 from sqlalchemy.orm import selectinload
 
-from crud.base import CRUDBase
-from models import Menu
-from schemas.menu import CreateMenu, UpdateMenu
+from .base import CRUDBase
+from ..common.principal import principal_cache
+from ..common.tree_cache import tree_cache
+from ..database.db_mysql import after_commit
+from ..models import Menu
+from ..schemas.menu import CreateMenu, UpdateMenu
 
 
 class CRUDMenu(CRUDBase[Menu, CreateMenu, UpdateMenu]):
@@ -30,23 +33,21 @@ class CRUDMenu(CRUDBase[Menu, CreateMenu, UpdateMenu]):
         menu = await db.execute(se)
         return menu.scalars().all()
 
-    async def get_role_menus(self, db, superuser: bool, menu_ids: list[int]) -> Sequence[Menu]:
-        se = select(self.model).order_by(asc(self.model.sort))
-        where_list = [self.model.menu_type.in_([0, 1])]
-        if not superuser:
-            where_list.append(self.model.id.in_(menu_ids))
-        se = se.where(and_(*where_list))
-        menu = await db.execute(se)
-        return menu.scalars().all()
-
     async def create(self, db, obj_in: CreateMenu) -> None:
         await self.create_(db, obj_in)
+        after_commit(db, lambda: tree_cache.invalidate('menu'))
 
     async def update(self, db, menu_id: int, obj_in: UpdateMenu) -> int:
-        return await self.update_(db, menu_id, obj_in)
+        count = await self.update_(db, menu_id, obj_in)
+        after_commit(db, principal_cache.invalidate_all)
+        after_commit(db, lambda: tree_cache.invalidate('menu'))
+        return count
 
     async def delete(self, db, menu_id: int) -> int:
-        return await self.delete_(db, menu_id)
+        count = await self.delete_(db, menu_id)
+        after_commit(db, principal_cache.invalidate_all)
+        after_commit(db, lambda: tree_cache.invalidate('menu'))
+        return count
 
     async def get_children(self, db, menu_id: int) -> list[Menu]:
         result = await db.execute(
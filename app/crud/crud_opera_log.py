@@ -1,16 +1,17 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-from sqlalchemy import Select, and_, delete, desc, select
+from sqlalchemy import Select, and_, delete, desc, func, insert, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .base import CRUDBase
+from ..database.db_mysql import async_engine
 from ..models import OperaLog
 from ..schemas.opera_log import CreateOperaLog, UpdateOperaLog
+from ..utils.timezone import timezone
 
 
 class CRUDOperaLogDao(CRUDBase[OperaLog, CreateOperaLog, UpdateOperaLog]):
-    async def get_all(self, username: str | None = None, status: int | None = None, ip: str | None = None) -> Select:
-        se = select(self.model).order_by(desc(self.model.created_time))
+    def _where(self, username: str | None = None, status: int | None = None, ip: str | None = None) -> list:
         where_list = []
         if username:
             where_list.append(self.model.username.like(f'%{username}%'))
@@ -18,6 +19,19 @@ class CRUDOperaLogDao(CRUDBase[OperaLog, CreateOperaLog, UpdateOperaLog]):
             where_list.append(self.model.status == status)
         if ip:
             where_list.append(self.model.ip.like(f'%{ip}%'))
+        return where_list
+
+    async def get_all(self, username: str | None = None, status: int | None = None, ip: str | None = None) -> Select:
+        se = select(self.model).order_by(desc(self.model.created_time))
+        where_list = self._where(username, status, ip)
+        if where_list:
+            se = se.where(and_(*where_list))
+        return se
+
+    def get_export(self, username: str | None = None, status: int | None = None, ip: str | None = None) -> Select:
+        """按列查询，不构建 ORM 实例，按主键顺序读取"""
+        se = select(*self.model.__table__.columns).order_by(self.model.id)
+        where_list = self._where(username, status, ip)
         if where_list:
             se = se.where(and_(*where_list))
         return se
@@ -25,13 +39,28 @@ class CRUDOperaLogDao(CRUDBase[OperaLog, CreateOperaLog, UpdateOperaLog]):
     async def create(self, db: AsyncSession, obj_in: CreateOperaLog) -> None:
         await self.create_(db, obj_in)
 
+    async def create_many(self, db: AsyncSession, objs_in: list[CreateOperaLog]) -> None:
+        """一条 executemany INSERT 写入多条日志，不构建 ORM 实例"""
+        now = timezone.now()
+        await db.execute(insert(self.model), [{**obj_in.model_dump(), 'created_time': now} for obj_in in objs_in])
+
     async def delete(self, db: AsyncSession, pk: list[int]) -> int:
         logs = await db.execute(delete(self.model).where(self.model.id.in_(pk)))
         return logs.rowcount
 
-    async def delete_all(self, db: AsyncSession) -> int:
-        logs = await db.execute(delete(self.model))
-        return logs.rowcount
+    async def delete_all(self) -> int:
+        """
+        TRUNCATE 清空全部分区，不逐行删除，也不会长时间锁表
+
+        TRUNCATE 会隐式提交事务，因此在独立的连接上执行，不影响请求中共享的 session；
+        返回的数量在清空前统计，与 TRUNCATE 不是原子操作，并发写入时仅为近似值
+
+        :return: 删除的日志数量（近似值）
+        """
+        async with async_engine.connect() as conn:
+            count = await conn.scalar(select(func.count()).select_from(self.model))
+            await conn.execute(text(f'TRUNCATE TABLE {self.model.__tablename__}'))
+        return count
 
 
 OperaLogDao: CRUDOperaLogDao = CRUDOperaLogDao(OperaLog)
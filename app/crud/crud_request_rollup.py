@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import and_, delete, func, select, tuple_, update
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .base import CRUDBase
+from ..database.db_mysql import READ_REPLICA
+from ..models import RequestRollup
+from ..schemas.request_rollup import CreateRequestRollup
+
+
+class CRUDRequestRollup(CRUDBase[RequestRollup, CreateRequestRollup, CreateRequestRollup]):
+    async def get_for_update(
+        self, db: AsyncSession, granularity: str, keys: list[tuple[datetime, str, str]]
+    ) -> Sequence[RequestRollup]:
+        """
+        锁定并获取已存在的统计行
+
+        :param db:
+        :param granularity: 时间粒度
+        :param keys: (bucket_time, path, username) 列表
+        :return:
+        """
+        stmt = (
+            select(self.model)
+            .where(
+                self.model.granularity == granularity,
+                tuple_(self.model.bucket_time, self.model.path, self.model.username).in_(keys),
+            )
+            .with_for_update()
+        )
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    async def upsert_many(self, db: AsyncSession, objs_in: list[CreateRequestRollup]) -> None:
+        """
+        按唯一键写入，已存在时由数据库累加计数、耗时并取最大耗时，多个进程同时写入同一时间桶时计数不会丢失
+
+        sketch 无法在 SQL 中合并，已存在的行保留原 sketch，由调用方在同一事务内通过 update_sketches 合并
+
+        :param db:
+        :param objs_in: 按唯一键排序，使并发事务以相同顺序加锁
+        :return:
+        """
+        stmt = insert(self.model)
+        stmt = stmt.on_duplicate_key_update(
+            count=self.model.count + stmt.inserted.count,
+            error_count=self.model.error_count + stmt.inserted.error_count,
+            cost_sum=self.model.cost_sum + stmt.inserted.cost_sum,
+            cost_max=func.greatest(self.model.cost_max, stmt.inserted.cost_max),
+        )
+        await db.execute(stmt, [obj_in.model_dump() for obj_in in objs_in])
+
+    async def update_sketches(self, db: AsyncSession, sketches: list[dict]) -> None:
+        """
+        按主键批量更新 sketch
+
+        :param db:
+        :param sketches: {'id': ..., 'sketch': ...} 列表
+        :return:
+        """
+        await db.execute(update(self.model), sketches)
+
+    async def get_range(
+        self,
+        db: AsyncSession,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        path: str | None = None,
+        username: str | None = None,
+    ) -> Sequence[RequestRollup]:
+        where_list = [
+            self.model.granularity == granularity,
+            self.model.bucket_time >= start,
+            self.model.bucket_time < end,
+        ]
+        if path is not None:
+            where_list.append(self.model.path == path)
+        if username is not None:
+            where_list.append(self.model.username == username)
+        stmt = (
+            select(self.model)
+            .where(and_(*where_list))
+            .order_by(self.model.bucket_time)
+            .execution_options(**READ_REPLICA)
+        )
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    async def delete_before(self, db: AsyncSession, granularity: str, before: datetime, limit: int) -> int:
+        """删除 before 之前的统计，每次最多 limit 条"""
+        ids = (
+            await db.scalars(
+                select(self.model.id)
+                .where(self.model.granularity == granularity, self.model.bucket_time < before)
+                .limit(limit)
+            )
+        ).all()
+        if not ids:
+            return 0
+        result = await db.execute(delete(self.model).where(self.model.id.in_(ids)))
+        return result.rowcount
+
+
+RequestRollupDao: CRUDRequestRollup = CRUDRequestRollup(RequestRollup)
@@ -5,9 +5,11 @@ from typing import Sequence
 from sqlalchemy import Select, delete, desc, select
 from sqlalchemy.orm import selectinload
 
-from crud.base import CRUDBase
-from models import Menu, Role, User
-from schemas.role import CreateRole, UpdateRole, UpdateRoleMenu
+from .base import CRUDBase
+from ..common.principal import principal_cache
+from ..database.db_mysql import after_commit
+from ..models import Menu, Role, User
+from ..schemas.role import CreateRole, UpdateRole, UpdateRoleMenu
 
 
 class CRUDRole(CRUDBase[Role, CreateRole, UpdateRole]):
@@ -50,6 +52,7 @@ class CRUDRole(CRUDBase[Role, CreateRole, UpdateRole]):
 
     async def update(self, db, role_id: int, obj_in: UpdateRole) -> int:
         rowcount = await self.update_(db, pk=role_id, obj_in=obj_in)
+        after_commit(db, principal_cache.invalidate_all)
         return rowcount
 
     async def update_menus(self, db, role_id: int, menu_ids: UpdateRoleMenu) -> int:
@@ -57,10 +60,12 @@ class CRUDRole(CRUDBase[Role, CreateRole, UpdateRole]):
         # 更新菜单
         menus = await db.execute(select(Menu).where(Menu.id.in_(menu_ids.menus)))
         current_role.menus = menus.scalars().all()
+        after_commit(db, principal_cache.invalidate_all)
         return len(current_role.menus)
 
     async def delete(self, db, role_id: list[int]) -> int:
         roles = await db.execute(delete(self.model).where(self.model.id.in_(role_id)))
+        after_commit(db, principal_cache.invalidate_all)
         return roles.rowcount
 
 
@@ -8,6 +8,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy.sql import Select
 from .base import CRUDBase
+from ..common.principal import principal_cache
+from ..database.db_mysql import READ_REPLICA, after_commit
 from ..models import Role, User
 from ..schemas.user_schema import Avatar, UserRegisterSchema, UpdateUser, UpdateUserRole
 
@@ -32,7 +34,7 @@ class CRUDUser(CRUDBase[User, UserRegisterSchema, UpdateUser]):
         :return: The user object if found, otherwise None.
         """
         user = await db.execute(
-            select(self.model).where(self.model.username == username)
+            select(self.model).where(self.model.username == username).execution_options(**READ_REPLICA)
         )
         return user.scalars().first()
 
@@ -40,7 +42,7 @@ class CRUDUser(CRUDBase[User, UserRegisterSchema, UpdateUser]):
         self, db: AsyncSession, nickname: str
     ) -> User | None:
         user = await db.execute(
-            select(self.model).where(self.model.nickname == nickname)
+            select(self.model).where(self.model.nickname == nickname).execution_options(**READ_REPLICA)
         )
         return user.scalars().first()
 
@@ -63,6 +65,16 @@ class CRUDUser(CRUDBase[User, UserRegisterSchema, UpdateUser]):
         await db.commit()
         return await user.rowcount
 
+    async def update_(self, db: AsyncSession, pk: int, obj_in, user_id: int | None = None) -> int:
+        count = await super().update_(db, pk, obj_in, user_id)
+        after_commit(db, lambda: principal_cache.invalidate(pk))
+        return count
+
+    async def delete_(self, db: AsyncSession, pk: int, *, del_flag: int | None = None) -> int:
+        count = await super().delete_(db, pk, del_flag=del_flag)
+        after_commit(db, lambda: principal_cache.invalidate(pk))
+        return count
+
     async def create(self, db: AsyncSession, regitster_data: dict) -> None:
         salt = text_captcha(5)
         regitster_data.update({"salt": salt})
@@ -178,19 +190,31 @@ class CRUDUser(CRUDBase[User, UserRegisterSchema, UpdateUser]):
     #     return user.rowcount
 
     async def get_with_relation(
-        self, db: AsyncSession, user_id: int = None, username: str = None
+        self, db: AsyncSession, user_id: int = None, username: str = None, *, read_replica: bool = True
     ) -> User | None:
+        """
+        获取用户及其部门、角色、菜单
+
+        :param db:
+        :param user_id:
+        :param username:
+        :param read_replica: 是否允许由只读副本执行，需要读到最新提交的数据时传 False
+        :return:
+        """
         where = []
         if user_id:
             where.append(self.model.id == user_id)
         if username:
             where.append(self.model.username == username)
-        user = await db.execute(
+        stmt = (
             select(self.model)
             .options(selectinload(self.model.dept))
             .options(selectinload(self.model.roles).joinedload(Role.menus))
             .where(*where)
         )
+        if read_replica:
+            stmt = stmt.execution_options(**READ_REPLICA)
+        user = await db.execute(stmt)
         return user.scalars().first()
 
 
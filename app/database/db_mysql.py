@@ -1,26 +1,265 @@
 """一些 MySQL 配置相关的函数和变量"""
+import asyncio
+import itertools
 import sys
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable
 from uuid import uuid4
 from fastapi import Depends
-from sqlalchemy import URL
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import URL, Engine, Select, event, util
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from typing_extensions import Annotated
 from app.common.log import logger as log
+from app.common.metrics import CallbackGauge, db_pool_checkout_wait, record_query, registry
+from app.common.profiler import profile_query
 from app.models.base import MappedBase
 from app.core.conf import settings
 
 
-def create_engine_and_session(url: str | URL):
+class PoolStats:
+    """连接池签出统计"""
+
+    __slots__ = ('checkouts', 'timeouts', 'wait_total', 'wait_max')
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait: float, timeout: bool = False) -> None:
+        if timeout:
+            self.timeouts += 1
+        else:
+            self.checkouts += 1
+        self.wait_total += wait
+        if wait > self.wait_max:
+            self.wait_max = wait
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """记录签出等待时间的连接池，每个连接池（主库、各只读副本）单独统计"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            self.stats.record(time.perf_counter() - start, timeout=True)
+            raise
+        wait = time.perf_counter() - start
+        self.stats.record(wait)
+        db_pool_checkout_wait.observe(wait)
+        return conn
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # 开始时间保存在本次执行的 context 上，语句出错时随 context 一起丢弃，不会残留在连接上
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    duration = time.perf_counter() - context._query_start
+    record_query(duration)
+    profile_query(statement, duration)
+
+
+def create_engine(url: str | URL) -> AsyncEngine:
     try:
         # 数据库引擎
-        engine = create_async_engine(url, echo=settings.DB_ECHO, future=True, pool_pre_ping=True)
+        engine = create_async_engine(
+            url,
+            echo=settings.DB_ECHO,
+            future=True,
+            pool_pre_ping=True,
+            poolclass=MonitoredQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
         # log.success('数据库连接成功')
     except Exception as e:
         log.error('❌ 数据库链接失败 {}', e)
         sys.exit()
     else:
-        db_session = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
-        return engine, db_session
+        # SQL 执行耗时统计
+        event.listen(engine.sync_engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine.sync_engine, 'after_cursor_execute', _after_cursor_execute)
+        return engine
+
+
+class ReplicaSet:
+    """只读副本集合，轮询选择可用副本，出错的副本会在一段时间内被跳过"""
+
+    def __init__(self, engines: list[AsyncEngine]):
+        self.engines = engines
+        self._cycle = itertools.cycle(range(len(engines)))
+        self._down_until = [0.0] * len(engines)
+        for index, engine in enumerate(engines):
+            event.listen(engine.sync_engine, 'handle_error', self._make_error_handler(index))
+
+    def _make_error_handler(self, index: int):
+        def handle_error(context) -> None:
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(index)
+
+        return handle_error
+
+    def mark_down(self, index: int) -> None:
+        self._down_until[index] = time.monotonic() + settings.DB_REPLICA_RETRY_SECONDS
+        log.warning('数据库只读副本 {} 不可用，{} 秒内改用主库', index, settings.DB_REPLICA_RETRY_SECONDS)
+
+    def mark_down_engine(self, engine: Engine) -> None:
+        for index, replica in enumerate(self.engines):
+            if replica.sync_engine is engine:
+                if self._down_until[index] <= time.monotonic():
+                    self.mark_down(index)
+                return
+
+    def choose(self) -> Engine | None:
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            index = next(self._cycle)
+            if self._down_until[index] <= now:
+                return self.engines[index].sync_engine
+        return None
+
+
+# 只读副本上出现连接级错误时改用主库重试：无法连接(2002/2003)、连接断开(2006/2013)；
+# 查询超时、锁等待等语句级错误说明副本本身可用，直接抛出
+REPLICA_RETRY_ERROR_CODES = (2002, 2003, 2006, 2013)
+
+
+def _is_connection_error(e: Exception) -> bool:
+    if isinstance(e, PoolTimeoutError):
+        return True
+    if not isinstance(e, DBAPIError):
+        return False
+    if e.connection_invalidated:
+        return True
+    return bool(getattr(e.orig, 'args', None)) and e.orig.args[0] in REPLICA_RETRY_ERROR_CODES
+
+
+class RoutingSession(Session):
+    """
+    读写分离 session
+
+    - 仅带有 read_replica 执行选项的 select 语句会被路由到只读副本，副本连接失败时改用主库重试一次
+    - 执行过写操作或以事务方式打开（scoped_session(begin=True)）的 session 固定使用主库，保证读到自己的写入
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+        if self._flushing or not isinstance(clause, Select):
+            # 记录当前事务中执行过写操作，提交或回滚时清除
+            self.info['use_primary'] = True
+            self.info['pending_writes'] = True
+            return async_engine.sync_engine
+        if replica_set is None or self.info.get('use_primary'):
+            return async_engine.sync_engine
+        if clause.get_execution_options().get('read_replica'):
+            replica = replica_set.choose()
+            if replica is not None:
+                self.info['replica_bind'] = replica
+                return replica
+        return async_engine.sync_engine
+
+    def execute(self, statement, params=None, *, execution_options=util.EMPTY_DICT, bind_arguments=None, **kwargs):
+        self.info.pop('replica_bind', None)
+        try:
+            return super().execute(
+                statement, params, execution_options=execution_options, bind_arguments=bind_arguments, **kwargs
+            )
+        except (DBAPIError, PoolTimeoutError) as e:
+            # 只读查询在副本上连接失败时标记副本不可用，并在主库上重试一次
+            replica = self.info.pop('replica_bind', None)
+            if replica is None or not _is_connection_error(e):
+                raise
+            replica_set.mark_down_engine(replica)
+            log.warning('只读副本连接失败，改用主库重试')
+            # 路由到副本说明当前事务中没有写操作，回滚以归还失败的副本连接，再开启新的事务
+            self.rollback()
+            return super().execute(
+                statement,
+                params,
+                execution_options=execution_options,
+                bind_arguments={'bind': async_engine.sync_engine},
+                **kwargs,
+            )
+
+
+def create_engine_and_session(url: str | URL):
+    engine = create_engine(url)
+    db_session = async_sessionmaker(
+        bind=engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
+    )
+    return engine, db_session
+
+
+def use_primary(session: AsyncSession) -> None:
+    """将 session 固定到主库"""
+    session.info['use_primary'] = True
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """
+    登记在 session 的事务提交后执行的异步回调，事务回滚时丢弃
+
+    缓存失效等操作需要在提交之后进行，否则失效与提交之间的读取会重新缓存旧数据
+
+    :param session:
+    :param callback:
+    :return:
+    """
+    session.info.setdefault('after_commit', []).append(callback)
+
+
+# 持有提交回调任务的引用，避免执行中被回收
+_after_commit_tasks: set[asyncio.Task] = set()
+
+
+async def _run_after_commit(callback: Callable[[], Awaitable[None]]) -> None:
+    try:
+        await callback()
+    except Exception as e:
+        log.error('事务提交回调执行失败，错误信息：{}', e)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _schedule_after_commit(session: Session) -> None:
+    session.info.pop('pending_writes', None)
+    callbacks = session.info.pop('after_commit', None)
+    if not callbacks:
+        return
+    tasks = [asyncio.ensure_future(_run_after_commit(callback)) for callback in callbacks]
+    for task in tasks:
+        _after_commit_tasks.add(task)
+        task.add_done_callback(_after_commit_tasks.discard)
+    session.info.setdefault('after_commit_tasks', []).extend(tasks)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_after_commit(session: Session) -> None:
+    session.info.pop('pending_writes', None)
+    session.info.pop('after_commit', None)
+
+
+async def wait_after_commit(session: AsyncSession) -> None:
+    """等待已提交事务的回调执行完毕，使响应返回时缓存已经失效"""
+    tasks = session.info.pop('after_commit_tasks', None)
+    if tasks:
+        await asyncio.gather(*tasks)
 
 
 SQLALCHEMY_DATABASE_URL = (
@@ -30,23 +269,168 @@ SQLALCHEMY_DATABASE_URL = (
 
 async_engine, async_db_session = create_engine_and_session(SQLALCHEMY_DATABASE_URL)
 
+replica_set = (
+    ReplicaSet(
+        [
+            create_engine(
+                f'mysql+asyncmy://{settings.DB_USER}:{settings.DB_PASSWORD}@{host}/'
+                f'{settings.DB_DATABASE}?charset={settings.DB_CHARSET}'
+            )
+            for host in settings.DB_REPLICA_HOSTS
+        ]
+    )
+    if settings.DB_REPLICA_HOSTS
+    else None
+)
+
+# 标记可以由只读副本执行的查询，用法：select(...).execution_options(**READ_REPLICA)
+READ_REPLICA = {'read_replica': True}
+
+
+class SessionScope:
+    """请求级 session 容器，session 在第一次使用时才创建（签出连接）"""
+
+    __slots__ = ('session',)
+
+    def __init__(self):
+        self.session: AsyncSession | None = None
+
+    def get(self) -> AsyncSession:
+        if self.session is None:
+            self.session = async_db_session()
+        return self.session
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await wait_after_commit(self.session)
+            await self.session.close()
+            self.session = None
+
+
+# 由 DBSessionMiddleware 在每个请求开始时设置
+request_session_scope: ContextVar[SessionScope | None] = ContextVar('request_session_scope', default=None)
+
+
+def _has_pending_writes(session: AsyncSession) -> bool:
+    """session 当前事务中是否有未提交的写操作（包括未 flush 的对象变更）"""
+    return bool(session.new or session.dirty or session.deleted or session.info.get('pending_writes'))
+
+
+@asynccontextmanager
+async def scoped_session(*, begin: bool = False) -> AsyncIterator[AsyncSession]:
+    """
+    获取当前请求共享的 session，请求之外（后台脚本、启动初始化等）则创建独立 session
+
+    begin=True 时块内的写操作在退出时提交，异常时回滚，只作用于本块：
+    共享 session 上只有读取自动开启的事务时，先结束该事务再在共享 session 上开启事务；
+    共享 session 有未提交的写操作时，改用独立的 session，避免提交或回滚请求中其它未完成的操作
+
+    :param begin: 是否在退出时提交事务，异常时回滚，等同于 async_db_session.begin()
+    :return:
+    """
+    scope = request_session_scope.get()
+    if begin and scope is not None:
+        shared = scope.get()
+        if shared.in_transaction() and not _has_pending_writes(shared):
+            # 之前的读取自动开启了只读事务，结束它以便继续复用共享 session；
+            # 使用 commit 而不是 rollback，避免已加载的对象过期
+            await shared.commit()
+    if scope is None or (begin and scope.get().in_transaction()):
+        async with (async_db_session.begin() if begin else async_db_session()) as session:
+            if begin:
+                use_primary(session)
+            yield session
+        if begin:
+            await wait_after_commit(session)
+        return
+    session = scope.get()
+    if not begin:
+        yield session
+        return
+    use_primary(session)
+    async with session.begin():
+        yield session
+    await wait_after_commit(session)
+
 
 async def get_db() -> AsyncSession:
     """session 生成器"""
-    session = async_db_session()
+    scope = request_session_scope.get()
+    session = scope.get() if scope is not None else async_db_session()
     try:
         yield session
     except Exception as se:
         await session.rollback()
         raise se
     finally:
-        await session.close()
+        # 请求级 session 由 DBSessionMiddleware 负责关闭
+        if scope is None:
+            await session.close()
 
 
 # Session Annotated
 CurrentSession = Annotated[AsyncSession, Depends(get_db)]
 
 
+def _pools() -> dict[tuple[str], MonitoredQueuePool]:
+    """主库及各只读副本的连接池，键为指标的 pool 标签"""
+    pools = {('primary',): async_engine.sync_engine.pool}
+    if replica_set is not None:
+        for index, engine in enumerate(replica_set.engines):
+            pools[(f'replica{index}',)] = engine.sync_engine.pool
+    return pools
+
+
+registry.register(
+    CallbackGauge(
+        'db_pool_checked_out',
+        '连接池已签出的连接数',
+        lambda: {labels: pool.checkedout() for labels, pool in _pools().items()},
+        ('pool',),
+    )
+)
+registry.register(
+    CallbackGauge(
+        'db_pool_overflow',
+        '连接池溢出连接数',
+        lambda: {labels: pool.overflow() for labels, pool in _pools().items()},
+        ('pool',),
+    )
+)
+registry.register(
+    CallbackGauge(
+        'db_pool_checkout_timeouts_total',
+        '连接池签出超时次数',
+        lambda: {labels: pool.stats.timeouts for labels, pool in _pools().items()},
+        ('pool',),
+    )
+)
+
+
+def get_pool_status() -> dict:
+    """连接池状态及签出等待统计"""
+    status = _engine_pool_status(async_engine)
+    if replica_set is not None:
+        status['replicas'] = [_engine_pool_status(engine) for engine in replica_set.engines]
+    return status
+
+
+def _engine_pool_status(engine: AsyncEngine) -> dict:
+    pool = engine.sync_engine.pool
+    stats = pool.stats
+    return {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': pool.overflow(),
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'checkouts': stats.checkouts,
+        'timeouts': stats.timeouts,
+        'wait_total_ms': round(stats.wait_total * 1000, 3),
+        'wait_max_ms': round(stats.wait_max * 1000, 3),
+    }
+
+
 async def create_table():
     """创建数据库表"""
     async with async_engine.begin() as coon:
@@ -1,21 +1,62 @@
 """访问日志中间件"""
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+import random
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.common.log import logger as log
+from app.core.conf import settings
+from app.utils.serializers import json_dumps
 from app.utils.timezone import timezone
 
 
-class AccessMiddleware(BaseHTTPMiddleware):
-    """请求和响应日志中间件"""
+class AccessMiddleware:
+    """
+    请求和响应日志中间件
+
+    纯 ASGI 实现，不读取请求体，每个请求输出一行 JSON；按 MIDDLEWARE_ACCESS_SAMPLE_RATE 采样，
+    慢请求和 5xx / 异常请求始终记录
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        # 请求日志
         start_time = timezone.now()
-        body = await request.body()
-        log.info(f"Request: {start_time} {request.method} {request.url} {body}")
-        response = await call_next(request)
-        # body = b"".join([chunk for chunk in response.__dict__['body_iterator']])
-        # end_time = timezone.now()
-        # log.info(f'响应状态码：{response.status_code} 响应体：{body} 响应时间：{end_time} 响应用时：{end_time - start_time}')
-        return response
+        start = time.perf_counter()
+        status_code = 500
+        response_bytes = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_bytes
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            elif message['type'] == 'http.response.body':
+                response_bytes += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = (time.perf_counter() - start) * 1000.0
+            if (
+                status_code >= 500
+                or duration >= settings.MIDDLEWARE_ACCESS_SLOW_MS
+                or random.random() < settings.MIDDLEWARE_ACCESS_SAMPLE_RATE
+            ):
+                client = scope.get('client')
+                record = {
+                    'time': start_time,
+                    'method': scope['method'],
+                    'path': scope['path'],
+                    'query': scope['query_string'].decode('latin-1'),
+                    'status': status_code,
+                    'bytes': response_bytes,
+                    'duration_ms': round(duration, 3),
+                    'client': client[0] if client else None,
+                }
+                log.info(json_dumps(record).decode('utf-8'))
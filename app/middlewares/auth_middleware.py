@@ -6,14 +6,14 @@ FastAPI 中间件，详情参看：
 - https://www.starlette.io/authentication/
 
 """
-from fastapi import Request, HTTPException, status
-from jose import jwt, JWTError
+from fastapi import Request
 from starlette.authentication import (
     AuthCredentials,
     AuthenticationBackend,
 )
 from app.services.user_service import UserService
 from app.core.conf import settings
+from app.utils.auth_helper import get_user_id_by_token
 
 class JWTAuthMiddleware(AuthenticationBackend):
     """JWT 认证中间件"""
@@ -39,17 +39,7 @@ class JWTAuthMiddleware(AuthenticationBackend):
         if scheme.lower() != "bearer":
             return
 
-        # 代码来自：https://fastapi.tiangolo.com/tutorial/security/oauth2-jwt/
-        credentials_exception = HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-        try:
-            # {'exp': 1705656122, 'sub': '1'}
-            user_id = jwt.decode(token, self.secret_key, self.algorithm).get("sub")
-            user = UserService.get_user_by_id(user_id)
-        except JWTError:
-            raise credentials_exception
+        # token 校验和用户状态校验均优先命中进程内缓存，未命中时才访问 redis / 数据库
+        user_id = await get_user_id_by_token(token)
+        user = await UserService.get_principal(user_id)
         return AuthCredentials(["authenticated"]), user
@@ -0,0 +1,27 @@
+"""请求级数据库 session 中间件"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.database.db_mysql import SessionScope, request_session_scope
+
+
+class DBSessionMiddleware:
+    """
+    为每个 http 请求建立一个共享的 session 容器，依赖注入的 CurrentSession 与各 service 中的
+    scoped_session() 复用同一个 session，一个请求最多只签出一个数据库连接
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        session_scope = SessionScope()
+        token = request_session_scope.set(session_scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_session_scope.reset(token)
+            await session_scope.close()
@@ -0,0 +1,55 @@
+"""指标采集中间件"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.common.metrics import (
+    RequestDBStats,
+    http_request_db_duration,
+    http_request_db_queries,
+    http_request_duration,
+    http_requests_in_flight,
+    http_requests_total,
+    request_db_stats,
+)
+
+
+class MetricsMiddleware:
+    """
+    按路由记录请求耗时、状态码、正在处理的请求数，以及每个请求的 SQL 数量和耗时
+
+    路由使用路径模板（E.g. /api/v1/suites/{suite_id}/clone），避免标签数量随路径参数增长
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        stats = RequestDBStats()
+        token = request_db_stats.set(stats)
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            request_db_stats.reset(token)
+            route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+            method = scope['method']
+            http_requests_total.inc(method, route, str(status_code))
+            http_request_duration.observe(duration, method, route)
+            http_request_db_queries.observe(stats.queries, route)
+            http_request_db_duration.observe(stats.duration, route)
@@ -1,18 +1,14 @@
 """操作日志中间件"""
-from typing import Any, AsyncGenerator
+from typing import Any
 
-from asgiref.sync import sync_to_async
-from starlette.background import BackgroundTask
-from starlette.datastructures import UploadFile
 from starlette.requests import Request
-from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from ..common.enums import OperaLogCipherType
 from ..common.log import logger as log
 from ..core.conf import settings
 from ..schemas.opera_log import CreateOperaLog
-from ..services.opera_log_service import OperaLogService
-from ..utils.encrypt import AESCipher, ItsDCipher, Md5Cipher
+from ..services.opera_log_service import opera_log_queue
+from ..utils.request_body import BodyCapture
 from ..utils.request_parse import parse_ip_info, parse_user_agent_info
 from ..utils.timezone import timezone
 
@@ -39,16 +35,9 @@ class OperaLogMiddleware:
         # 请求信息解析
         user_agent, device, os, browser = await parse_user_agent_info(request)
         ip, country, region, city = await parse_ip_info(request)
-        try:
-            # 此信息依赖于 jwt 中间件
-            username = request.user.username
-        except AttributeError:
-            username = None
+        # 此信息依赖于 jwt 中间件，未注册时为空（request.user 在未注册时会触发断言）
+        username = getattr(scope.get('user'), 'username', None)
         method = request.method
-        args = await self.get_request_args(request)
-        router = request.scope.get('route')
-        summary = getattr(router, 'summary', None) or ''
-        args.update(request.path_params)
 
         # 设置附加请求信息
         request.state.ip = ip
@@ -60,16 +49,23 @@ class OperaLogMiddleware:
         request.state.browser = browser
         request.state.device = device
 
-        # 执行请求
+        # 执行请求，请求体在应用读取时顺带采集
+        capture = BodyCapture(request.headers.get('content-type'), request.headers.get('content-length'))
         start_time = timezone.now()
-        code, msg, status, err = await self.execute_request(request, send)
+        code, msg, status, err = await self.execute_request(request, capture, send)
         end_time = timezone.now()
         cost_time = (end_time - start_time).total_seconds() * 1000.0
 
-        # 脱敏处理
-        args = await self.desensitization(args)
+        # 路由信息在应用处理后才写入 scope
+        router = scope.get('route')
+        summary = getattr(router, 'summary', None) or ''
+        args = dict(request.query_params)
+        args.update(scope.get('path_params', {}))
+        body_summary = capture.summary
+        if body_summary:
+            args['__body__'] = body_summary
 
-        # 日志创建
+        # 日志创建，请求体解析和脱敏由后台任务完成
         opera_log_in = CreateOperaLog(
             username=username,
             method=method,
@@ -89,27 +85,28 @@ class OperaLogMiddleware:
             msg=msg,
             cost_time=cost_time,
             opera_time=start_time,
+            body=capture.body,
+            content_type=capture.content_type,
         )
-        back = BackgroundTask(OperaLogService.create, obj_in=opera_log_in)
-        await back()
+        await opera_log_queue.put(opera_log_in)
 
         # 错误抛出
         if err:
             raise err from None
 
-    async def execute_request(self, request: Request, send: Send) -> tuple:
+    async def execute_request(self, request: Request, capture: BodyCapture, send: Send) -> tuple:
         err: Any = None
+        receive = request.receive
+
+        async def capture_receive() -> Message:
+            message = await receive()
+            if message['type'] == 'http.request':
+                capture.feed(message.get('body', b''))
+            return message
+
         try:
-            # 详见 https://github.com/tiangolo/fastapi/discussions/8385#discussioncomment-6117967
-            async def wrapped_rcv_gen() -> AsyncGenerator:
-                async for _ in request.stream():
-                    yield {'type': 'http.request', 'body': await request.body()}
-                    async for message in request.receive:  # type: ignore
-                        yield message
-
-            wrapped_rcv = wrapped_rcv_gen().__anext__
-            await self.app(request.scope, wrapped_rcv, send)
-            code, msg, status = await self.exception_middleware_handler(request)
+            await self.app(request.scope, capture_receive, send)
+            code, msg, status = self.exception_middleware_handler(request)
         except Exception as e:
             log.exception(e)
             # code 处理包含 SQLAlchemy 和 Pydantic
@@ -121,7 +118,6 @@ class OperaLogMiddleware:
         return str(code), msg, status, err
 
     @staticmethod
-    @sync_to_async
     def exception_middleware_handler(request: Request) -> tuple:
         # 预置响应信息
         code = 200
@@ -144,47 +140,3 @@ class OperaLogMiddleware:
             msg = validation_exception.get('msg', 'Bad Request')
             status = 0
         return code, msg, status
-
-    @staticmethod
-    async def get_request_args(request: Request) -> dict:
-        args = dict(request.query_params)
-        form_data = await request.form()
-        if len(form_data) > 0:
-            args.update({k: v.filename if isinstance(v, UploadFile) else v for k, v in form_data.items()})
-        else:
-            body_data = await request.body()
-            if body_data:
-                json_data = await request.json()
-                if not isinstance(json_data, dict):
-                    json_data = {
-                        f'{type(json_data)}_to_dict_data': json_data.decode('utf-8')
-                        if isinstance(json_data, bytes)
-                        else json_data
-                    }
-                args.update(json_data)
-        return args
-
-    @staticmethod
-    @sync_to_async
-    def desensitization(args: dict) -> dict | None:
-        if len(args) > 0:
-            match settings.OPERA_LOG_ENCRYPT:
-                case OperaLogCipherType.aes:
-                    for key in args.keys():
-                        if key in settings.OPERA_LOG_ENCRYPT_INCLUDE:
-                            args[key] = (AESCipher(settings.OPERA_LOG_ENCRYPT_SECRET_KEY).encrypt(args[key])).hex()
-                case OperaLogCipherType.md5:
-                    for key in args.keys():
-                        if key in settings.OPERA_LOG_ENCRYPT_INCLUDE:
-                            args[key] = Md5Cipher.encrypt(args[key])
-                case OperaLogCipherType.itsdangerous:
-                    for key in args.keys():
-                        if key in settings.OPERA_LOG_ENCRYPT_INCLUDE:
-                            args[key] = ItsDCipher(settings.OPERA_LOG_ENCRYPT_SECRET_KEY).encrypt(args[key])
-                case OperaLogCipherType.plan:
-                    pass
-                case _:
-                    for key in args.keys():
-                        if key in settings.OPERA_LOG_ENCRYPT_INCLUDE:
-                            args[key] = '******'
-        return args if len(args) > 0 else None
@@ -0,0 +1,40 @@
+"""SQL 分析中间件"""
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.common.log import logger as log
+from app.common.profiler import QueryProfile, query_profile, query_profiler
+
+
+class QueryProfilerMiddleware:
+    """
+    开启 SQL 分析时，统计每个请求的 SQL，在响应头中返回 Server-Timing，并输出汇总日志，发现 N+1 查询时输出警告
+
+    Server-Timing 在响应开始时写入，流式响应中之后执行的 SQL 只体现在日志中
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not query_profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+
+        async def send_wrapper(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing', profile.server_timing())
+            await send(message)
+
+        token = query_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_profile.reset(token)
+            method, path = scope['method'], scope['path']
+            log.info(profile.summary(method, path))
+            for statement, count, duration in profile.repeated():
+                log.warning(f'疑似 N+1 查询 {method} {path}: {count} 次 {duration * 1000:.3f} ms: {statement}')
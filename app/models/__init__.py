@@ -13,6 +13,7 @@ from .sys_dict_type import DictType
 from .sys_login_log import LoginLog
 from .sys_menu import Menu
 from .sys_opera_log import OperaLog
+from .sys_request_rollup import RequestRollup
 from .sys_role import Role
 from .sys_user import User
 from .fuzz_test_case import FuzzTestCase
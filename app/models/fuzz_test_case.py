@@ -1,6 +1,6 @@
 from typing import Union
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import ForeignKey, Index, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base, id_key
@@ -21,6 +21,15 @@ class FuzzTestCase(Base):
     suite: Mapped[Union['FuzzTestSuite', None]] = relationship(init=False, back_populates='cases')
     # 模糊测试用例和模糊测试字段之间是一对多的关系
     fields: Mapped[Union['FuzzTestField', None]] = relationship(init=False, back_populates='case')
+    # suite id 和 name 唯一确定一个用例，复制套件时依赖它完成用例 id 的重映射
+    # 列表接口按 suite_id 过滤时使用 suite_id_name 的最左前缀，不再单独建索引
+    __table_args__ = (
+        UniqueConstraint("suite_id", "name", name="suite_id_name"),
+        Index(
+            "ft_sys_fuzz_test_cases_name_description", "name", "description",
+            mysql_prefix="FULLTEXT", mysql_with_parser="ngram",
+        ),
+    )
     
     
     
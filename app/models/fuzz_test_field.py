@@ -1,7 +1,7 @@
 """字段表数据库原型"""
 from typing import Union
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey, String, JSON, UniqueConstraint
+from sqlalchemy import Computed, ForeignKey, String, JSON, Index, Text, UniqueConstraint
 from .base import Base, id_key
 
 
@@ -15,8 +15,30 @@ class FuzzTestField(Base):
     case_id: Mapped[int | None] = mapped_column(
         ForeignKey("sys_fuzz_test_cases.id", ondelete="SET NULL"), default=None, comment="字段所属用例的id"
     )
+    # 由 attribute 派生的存储生成列，随字段的增删改由 MySQL 自动维护，供检索接口建立索引
+    attribute_type: Mapped[str | None] = mapped_column(
+        String(50),
+        Computed("json_unquote(json_extract(`attribute`, '$.type'))", persisted=True),
+        init=False,
+        comment="属性中的字段类型",
+    )
+    # 保存完整默认值，FULLTEXT 索引不需要前缀长度，截断会导致较长的值检索不到
+    default_value: Mapped[str | None] = mapped_column(
+        Text,
+        Computed("json_unquote(json_extract(`attribute`, '$.default_value'))", persisted=True),
+        init=False,
+        comment="属性中的默认值",
+    )
     case: Mapped[Union['FuzzTestCase', None]] = relationship(init=False, back_populates='fields')
     # case id 和 name 唯一确定一个字段
+    # 列表接口按 case_id (+ type) 过滤，case_id 单列过滤使用 case_id_name 的最左前缀
+    # ix_sys_fuzz_test_fields_case_id_type 的二级索引隐式包含主键 id，可直接服务键集分页
     __table_args__ = (
         UniqueConstraint("case_id", "name", name="case_id_name"),
+        Index("ix_sys_fuzz_test_fields_case_id_type", "case_id", "type"),
+        Index("ix_sys_fuzz_test_fields_attribute_type", "attribute_type"),
+        Index(
+            "ft_sys_fuzz_test_fields_default_value", "default_value",
+            mysql_prefix="FULLTEXT", mysql_with_parser="ngram",
+        ),
     )
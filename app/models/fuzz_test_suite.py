@@ -1,6 +1,6 @@
 from typing import Union
 
-from sqlalchemy import ForeignKey, String, JSON, Boolean, UniqueConstraint
+from sqlalchemy import ForeignKey, String, JSON, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base, id_key
@@ -32,6 +32,13 @@ class FuzzTestSuite(Base):
     cases: Mapped[list['FuzzTestCase']] = relationship(init=False, back_populates='suite')
 
     # name和user id唯一确认一个测试套件
+    # 列表接口按 user_id / is_system 过滤后以 id 做键集分页，InnoDB 二级索引隐式包含主键 id
     __table_args__ = (
         UniqueConstraint("name", "user_id", name="name_user_id"),
+        Index("ix_sys_fuzz_test_suites_user_id", "user_id"),
+        Index("ix_sys_fuzz_test_suites_is_system", "is_system"),
+        Index(
+            "ft_sys_fuzz_test_suites_name_description", "name", "description",
+            mysql_prefix="FULLTEXT", mysql_with_parser="ngram",
+        ),
     )
\ No newline at end of file
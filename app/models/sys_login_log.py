@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 from datetime import datetime
 
-from sqlalchemy import String
+from sqlalchemy import Index, String
 from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -14,6 +14,13 @@ class LoginLog(DataClassBase):
     """登录日志表"""
 
     __tablename__ = 'sys_login_log'
+    __table_args__ = (
+        Index('ix_sys_login_log_created_time', 'created_time'),
+        {
+            # 按月分区，分区由 LogRetentionService 维护，主键需包含分区列
+            'mysql_partition_by': 'RANGE (TO_DAYS(created_time)) (PARTITION pmax VALUES LESS THAN MAXVALUE)',
+        },
+    )
 
     id: Mapped[id_key] = mapped_column(init=False)
     user_uuid: Mapped[str] = mapped_column(String(50), comment='用户UUID')
@@ -29,4 +36,6 @@ class LoginLog(DataClassBase):
     device: Mapped[str | None] = mapped_column(String(50), comment='设备')
     msg: Mapped[str] = mapped_column(LONGTEXT, comment='提示消息')
     login_time: Mapped[datetime] = mapped_column(comment='登录时间')
-    created_time: Mapped[datetime] = mapped_column(init=False, default_factory=timezone.now, comment='创建时间')
+    created_time: Mapped[datetime] = mapped_column(
+        primary_key=True, init=False, default_factory=timezone.now, comment='创建时间'
+    )
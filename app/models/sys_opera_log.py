@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 from datetime import datetime
 
-from sqlalchemy import String
+from sqlalchemy import Index, String
 from sqlalchemy.dialects.mysql import JSON, LONGTEXT
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -14,6 +14,13 @@ class OperaLog(DataClassBase):
     """操作日志表"""
 
     __tablename__ = 'sys_opera_log'
+    __table_args__ = (
+        Index('ix_sys_opera_log_created_time', 'created_time'),
+        {
+            # 按月分区，分区由 LogRetentionService 维护，主键需包含分区列
+            'mysql_partition_by': 'RANGE (TO_DAYS(created_time)) (PARTITION pmax VALUES LESS THAN MAXVALUE)',
+        },
+    )
 
     id: Mapped[id_key] = mapped_column(init=False)
     username: Mapped[str | None] = mapped_column(String(20), comment='用户名')
@@ -34,4 +41,6 @@ class OperaLog(DataClassBase):
     msg: Mapped[str | None] = mapped_column(LONGTEXT, comment='提示消息')
     cost_time: Mapped[float] = mapped_column(insert_default=0.0, comment='请求耗时ms')
     opera_time: Mapped[datetime] = mapped_column(comment='操作时间')
-    created_time: Mapped[datetime] = mapped_column(init=False, default_factory=timezone.now, comment='创建时间')
+    created_time: Mapped[datetime] = mapped_column(
+        primary_key=True, init=False, default_factory=timezone.now, comment='创建时间'
+    )
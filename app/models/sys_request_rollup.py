@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from sqlalchemy import String, UniqueConstraint
+from sqlalchemy.dialects.mysql import JSON
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import DataClassBase, id_key
+
+
+class RequestRollup(DataClassBase):
+    """请求统计汇总表，由操作日志按分钟、小时聚合"""
+
+    __tablename__ = 'sys_request_rollup'
+    __table_args__ = (
+        UniqueConstraint('granularity', 'bucket_time', 'path', 'username', name='uq_sys_request_rollup_bucket'),
+    )
+
+    id: Mapped[id_key] = mapped_column(init=False)
+    granularity: Mapped[str] = mapped_column(String(10), comment='时间粒度（minute, hour）')
+    bucket_time: Mapped[datetime] = mapped_column(comment='时间桶起点')
+    path: Mapped[str] = mapped_column(String(500), comment='请求路径')
+    username: Mapped[str] = mapped_column(String(20), comment='用户名，匿名请求为空字符串')
+    count: Mapped[int] = mapped_column(comment='请求数')
+    error_count: Mapped[int] = mapped_column(comment='异常请求数')
+    cost_sum: Mapped[float] = mapped_column(comment='总耗时ms')
+    cost_max: Mapped[float] = mapped_column(comment='最大耗时ms')
+    sketch: Mapped[dict] = mapped_column(JSON(), comment='耗时分位数 sketch')
@@ -1,4 +1,8 @@
 """模糊测试用例请求体原型"""
+from datetime import datetime
+
+from pydantic import ConfigDict
+
 from .base import SchemaBase
 
 class CaseSchema(SchemaBase):
@@ -86,4 +90,15 @@ class DeleteCaseSchema(CaseSchema):
                 }
             ]
         }
-    }
\ No newline at end of file
+    }
+
+
+class GetCaseListDetail(SchemaBase):
+    """测试用例列表项"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    description: str | None = None
+    suite_id: int | None = None
+    created_time: datetime
@@ -1,4 +1,8 @@
 """模糊测试字段请求体原型"""
+from datetime import datetime
+
+from pydantic import ConfigDict
+
 from .base import SchemaBase
 
 class FieldSchema(SchemaBase):
@@ -230,4 +234,16 @@ class DeleteFieldSchema(FieldSchema):
 # class FieldSchema(SchemaBase):
 #     """TODO"""
 #     name: str
-#     attribute: dict | None = None
\ No newline at end of file
+#     attribute: dict | None = None
+
+
+class GetFieldListDetail(SchemaBase):
+    """测试字段列表项"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    type: str
+    attribute: dict | None = None
+    case_id: int | None = None
+    created_time: datetime
@@ -1,4 +1,8 @@
 """模糊测试套件请求体原型"""
+from datetime import datetime
+
+from pydantic import ConfigDict
+
 from .base import SchemaBase
 
 
@@ -69,4 +73,35 @@ class SuiteTemplateSchema(SuiteSchema):
     cases_name: list[str]
 
 class DeleteSuiteSchema(SuiteSchema):
-    pass
\ No newline at end of file
+    pass
+
+class CloneSuiteSchema(SchemaBase):
+    """
+    - name
+    - desc
+    """
+    name: str
+    desc: str | None = None
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "name": "my_suite",
+                    "desc": "从系统套件复制",
+                }
+            ]
+        }
+    }
+
+
+class GetSuiteListDetail(SchemaBase):
+    """测试套件列表项"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    description: str | None = None
+    is_system: bool | None = None
+    is_user_saved: bool | None = None
+    user_id: int | None = None
+    created_time: datetime
@@ -30,7 +30,9 @@ class OperaLogBase(SchemaBase):
 
 
 class CreateOperaLog(OperaLogBase):
-    pass
+    # 原始请求体，由操作日志后台任务解析后合并到 args，不写入数据库
+    body: bytes | None = Field(default=None, exclude=True)
+    content_type: str | None = Field(default=None, exclude=True)
 
 
 class UpdateOperaLog(OperaLogBase):
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from .base import SchemaBase
+
+
+class CreateRequestRollup(SchemaBase):
+    granularity: str
+    bucket_time: datetime
+    path: str
+    username: str
+    count: int
+    error_count: int
+    cost_sum: float
+    cost_max: float
+    sketch: dict
+
+
+class GetRequestRollupPoint(SchemaBase):
+    bucket_time: datetime
+    count: int
+    error_count: int
+    cost_avg: float
+    cost_max: float
+    p50: float | None = None
+    p95: float | None = None
+    p99: float | None = None
@@ -5,14 +5,14 @@ from fastapi import Request
 from fastapi.security import OAuth2PasswordRequestForm
 from starlette.background import BackgroundTask, BackgroundTasks
 
-from app.utils.auth_helper import create_token, get_token, password_verify
+from app.utils.auth_helper import create_token, get_token, jwt_decode, password_verify, revoke_tokens
 from ..common.enums import LoginLogStatusType
 from ..common.exception import errors
 from ..common.redis import redis_client
 from ..common.response.response_code import CustomErrorCode
 from ..core.conf import settings
 from ..crud.crud_user import USERDAO
-from app.database.db_mysql import async_db_session
+from app.database.db_mysql import scoped_session
 from ..models import User
 from ..schemas.user_schema import UserLoginSchema
 from ..services.login_log_service import LoginLogService
@@ -26,7 +26,7 @@ class AuthService:
     async def swagger_login(self, form_data: OAuth2PasswordRequestForm) -> tuple[str, User]:
         """
         """
-        async with async_db_session() as db:
+        async with scoped_session() as db:
             current_user = await AuthService._get_user(db, form_data)
             # 更新登陆时间
             await USERDAO.update_login_time(db, form_data.username, self.login_time)
@@ -52,7 +52,7 @@ class AuthService:
             :return: A tuple containing the access token, refresh token, access token expiration time,
                      refresh token expiration time, and the user object.
             """
-            async with async_db_session() as db:
+            async with scoped_session() as db:
                 try:
                     current_user = await AuthService._get_user(db, obj)
                     captcha_code = await redis_client.get(f'{settings.CAPTCHA_LOGIN_REDIS_PREFIX}:{request.state.ip}')
@@ -98,16 +98,16 @@ class AuthService:
 
     @staticmethod
     async def new_token(*, request: Request, refresh_token: str) -> tuple[str, str, datetime, datetime]:
-        user_id = await jwt.jwt_decode(refresh_token)
+        user_id = jwt_decode(refresh_token)
         if request.user.id != user_id:
             raise errors.TokenError(msg='刷新 token 无效')
-        async with async_db_session() as db:
+        async with scoped_session() as db:
             current_user = await USERDAO.get_user_by_id(db, user_id)
             if not current_user:
                 raise errors.NotFoundError(msg='用户不存在')
             elif not current_user.status:
                 raise errors.AuthorizationError(msg='用户已锁定，操作失败')
-            current_token = await get_token(request)
+            current_token = get_token(request)
             (
                 new_access_token,
                 new_refresh_token,
@@ -120,13 +120,11 @@ class AuthService:
 
     @staticmethod
     async def logout(request: Request) -> None:
-        token = await get_token(request)
+        token = get_token(request)
         if request.user.is_multi_login:
-            key = f'{settings.TOKEN_REDIS_PREFIX}:{request.user.id}:{token}'
-            await redis_client.delete(key)
+            await revoke_tokens(request.user.id, token)
         else:
-            prefix = f'{settings.TOKEN_REDIS_PREFIX}:{request.user.id}:'
-            await redis_client.delete_prefix(prefix)
+            await revoke_tokens(request.user.id)
 
     @staticmethod
     async def _get_user(db, form_data):
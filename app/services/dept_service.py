@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import json
+
+from typing import Any
+
+from ..common.tree_cache import tree_cache
+from ..crud.crud_dept import DeptDao
+from ..database.db_mysql import scoped_session
+from ..utils.build_tree import get_tree_data
+
+
+class DeptService:
+    @staticmethod
+    async def get_dept_tree(
+        *, name: str | None = None, leader: str | None = None, phone: str | None = None, status: int | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        获取部门树，按过滤条件缓存，返回的树为共享对象，不要修改
+
+        :param name:
+        :param leader:
+        :param phone:
+        :param status:
+        :return:
+        """
+
+        async def load() -> list[dict[str, Any]]:
+            async with scoped_session() as db:
+                depts = await DeptDao.get_all(db, name=name, leader=leader, phone=phone, status=status)
+            return await get_tree_data(depts)
+
+        return await tree_cache.get('dept', json.dumps([name, leader, phone, status]), load)
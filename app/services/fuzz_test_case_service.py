@@ -0,0 +1,28 @@
+from sqlalchemy import Select
+
+from app.crud.crud_fuzz_test_case import FUZZTESTCASEDAO
+
+
+class FuzzTestCaseService:
+    @staticmethod
+    async def get_select(*, user_id: int, suite_id: int, name: str | None = None) -> Select:
+        return await FUZZTESTCASEDAO.get_list(user_id, suite_id, name=name)
+
+    @staticmethod
+    async def get_search_select(
+        *,
+        user_id: int,
+        keyword: str | None = None,
+        suite_id: int | None = None,
+        field_type: str | None = None,
+        field_name: str | None = None,
+        default_contains: str | None = None,
+    ) -> Select:
+        return await FUZZTESTCASEDAO.get_search(
+            user_id,
+            keyword=keyword,
+            suite_id=suite_id,
+            field_type=field_type,
+            field_name=field_name,
+            default_contains=default_contains,
+        )
@@ -0,0 +1,11 @@
+from sqlalchemy import Select
+
+from app.crud.crud_fuzz_test_field import FUZZTESTFIELDDAO
+
+
+class FuzzTestFieldService:
+    @staticmethod
+    async def get_select(
+        *, user_id: int, case_id: int, name: str | None = None, field_type: str | None = None
+    ) -> Select:
+        return await FUZZTESTFIELDDAO.get_list(user_id, case_id, name=name, field_type=field_type)
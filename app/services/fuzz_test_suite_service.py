@@ -0,0 +1,37 @@
+from fastapi import HTTPException, status
+from sqlalchemy import Select
+
+from app.crud.crud_fuzz_test_suite import FUZZTESTSUITEDAO
+from app.database.db_mysql import scoped_session
+from app.schemas.fuzz_test_suite_schema import CloneSuiteSchema
+
+
+class FuzzTestSuiteService:
+    @staticmethod
+    async def get_select(*, user_id: int, name: str | None = None, is_system: bool | None = None) -> Select:
+        return await FUZZTESTSUITEDAO.get_list(user_id, name=name, is_system=is_system)
+
+    @staticmethod
+    async def clone(*, user_id: int, suite_id: int, obj: CloneSuiteSchema) -> int:
+        """
+        复制系统套件或用户自己的套件，复制过程在同一个事务中完成
+
+        :param user_id: 当前用户 id
+        :param suite_id: 被复制的套件 id
+        :param obj: 新套件的名称和描述
+        :return: 新套件 id
+        """
+        async with scoped_session(begin=True) as db:
+            suite = await FUZZTESTSUITEDAO.get_(db, primary_key=suite_id)
+            if not suite:
+                raise HTTPException(status.HTTP_404_NOT_FOUND, "测试套件不存在")
+            if not suite.is_system and suite.user_id != user_id:
+                raise HTTPException(status.HTTP_403_FORBIDDEN, "无权复制该测试套件")
+            if await FUZZTESTSUITEDAO.read_suite(db, user_id, obj.name):
+                raise HTTPException(status.HTTP_403_FORBIDDEN, "测试套件名称已存在")
+            new_suite_id = await FUZZTESTSUITEDAO.clone_suite(
+                db, suite_id, user_id, obj.name, obj.desc
+            )
+            if new_suite_id is None:
+                raise HTTPException(status.HTTP_404_NOT_FOUND, "测试套件不存在")
+            return new_suite_id
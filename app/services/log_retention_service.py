@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from sqlalchemy import text
+
+from ..common.log import logger as log
+from ..core.conf import settings
+from ..database.db_mysql import scoped_session
+from ..models import LoginLog, OperaLog
+from ..utils.timezone import timezone
+from .request_rollup_service import RequestRollupService
+
+# 按月分区的日志表
+PARTITIONED_LOG_TABLES = (OperaLog.__tablename__, LoginLog.__tablename__)
+
+
+def _add_months(day: date, months: int) -> date:
+    """返回 day 所在月份加上 months 个月后的第一天"""
+    month = day.year * 12 + day.month - 1 + months
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def _partition_name(upper: date) -> str:
+    """分区以其包含的月份命名，上界为下个月第一天"""
+    return f'p{_add_months(upper, -1):%Y%m}'
+
+
+class LogRetentionService:
+    """
+    日志分区维护
+
+    分区方式为 RANGE (TO_DAYS(created_time))，每月一个分区，另有 pmax 兜底：
+    - 将 pmax 拆分出未来几个月的分区，pmax 始终保持为空，拆分不需要搬移数据
+    - pmax 中意外存在数据时（如维护任务长时间未运行），从其中最早的月份开始拆分，每条日志仍落在所属月份的分区
+    - 直接 DROP 早于保留期的分区，代替逐行 DELETE
+    """
+
+    @staticmethod
+    async def get_partitions(table: str) -> dict[str, int | None]:
+        """
+        获取表的分区
+
+        :param table: 表名
+        :return: 分区名 -> 上界（TO_DAYS 值），pmax 为 None
+        """
+        async with scoped_session() as db:
+            result = await db.execute(
+                text(
+                    'SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS '
+                    'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL '
+                    'ORDER BY PARTITION_ORDINAL_POSITION'
+                ),
+                {'table': table},
+            )
+            return {
+                name: None if description == 'MAXVALUE' else int(description) for name, description in result.all()
+            }
+
+    @staticmethod
+    async def rotate(table: str, today: date | None = None) -> list[str]:
+        """
+        创建未来分区并删除过期分区
+
+        :param table: 表名
+        :param today: 当前日期，默认为今天
+        :return: 被删除的分区
+        """
+        today = today or timezone.now().date()
+        partitions = await LogRetentionService.get_partitions(table)
+        if 'pmax' not in partitions:
+            log.warning(f'表 {table} 未按月分区，跳过日志分区维护')
+            return []
+        async with scoped_session(begin=True) as db:
+            # pmax 中已有数据时，从最早的月份开始创建分区
+            first_month = (
+                await db.execute(text(f'SELECT MIN(created_time) FROM {table} PARTITION (pmax)'))
+            ).scalar()
+            start = 1
+            if first_month is not None:
+                start = min(0, (first_month.year - today.year) * 12 + first_month.month - today.month) + 1
+            # 创建未来分区
+            new_partitions = []
+            for i in range(start, settings.LOG_PARTITION_PRECREATE_MONTHS + 2):
+                upper = _add_months(today, i)
+                name = _partition_name(upper)
+                if name not in partitions:
+                    new_partitions.append(f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{upper:%Y-%m-%d}'))")
+            if new_partitions:
+                await db.execute(
+                    text(
+                        f'ALTER TABLE {table} REORGANIZE PARTITION pmax INTO '
+                        f'({", ".join(new_partitions)}, PARTITION pmax VALUES LESS THAN MAXVALUE)'
+                    )
+                )
+            # 删除过期分区
+            cutoff = _add_months(today, 1 - settings.LOG_RETENTION_MONTHS)
+            cutoff_days = (await db.execute(text('SELECT TO_DAYS(:cutoff)'), {'cutoff': cutoff})).scalar()
+            expired = [name for name, upper in partitions.items() if upper is not None and upper <= cutoff_days]
+            if expired:
+                await db.execute(text(f'ALTER TABLE {table} DROP PARTITION {", ".join(expired)}'))
+        if expired:
+            log.info(f'已删除表 {table} 的过期日志分区：{", ".join(expired)}')
+        return expired
+
+    @staticmethod
+    async def run() -> dict[str, list[str]]:
+        """维护所有日志表，并清理过期的分钟级请求统计"""
+        result = {table: await LogRetentionService.rotate(table) for table in PARTITIONED_LOG_TABLES}
+        count = await RequestRollupService.purge_minutes(timezone.now())
+        if count:
+            log.info(f'已删除 {count} 条过期的分钟级请求统计')
+        return result
@@ -1,16 +1,20 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from datetime import datetime
+from typing import AsyncIterator
 
 from fastapi import Request
 from sqlalchemy import Select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..common.enums import ExportFormatType
 from ..common.log import logger as log
+from ..core.conf import settings
 from ..crud.crud_login_log import LoginLogDao
-from app.database.db_mysql import async_db_session
+from app.database.db_mysql import scoped_session
 from ..models import User
 from ..schemas.login_log import CreateLoginLog
+from ..utils.export import stream_export
 
 
 class LoginLogService:
@@ -18,6 +22,12 @@ class LoginLogService:
     async def get_select(*, username: str, status: int, ip: str) -> Select:
         return await LoginLogDao.get_all(username=username, status=status, ip=ip)
 
+    @staticmethod
+    def export(
+        *, fmt: ExportFormatType, username: str | None = None, status: int | None = None, ip: str | None = None
+    ) -> AsyncIterator[bytes]:
+        return stream_export(LoginLogDao.get_export(username=username, status=status, ip=ip), fmt)
+
     @staticmethod
     async def create(
         *, db: AsyncSession, request: Request, user: User, login_time: datetime, status: int, msg: str
@@ -45,12 +55,14 @@ class LoginLogService:
 
     @staticmethod
     async def delete(*, pk: list[int]) -> int:
-        async with async_db_session.begin() as db:
-            count = await LoginLogDao.delete(db, pk)
-            return count
+        # 分批删除，每批单独提交，避免一个大事务长时间持有行锁
+        count = 0
+        size = settings.LOG_DELETE_CHUNK_SIZE
+        for i in range(0, len(pk), size):
+            async with scoped_session(begin=True) as db:
+                count += await LoginLogDao.delete(db, pk[i : i + size])
+        return count
 
     @staticmethod
     async def delete_all() -> int:
-        async with async_db_session.begin() as db:
-            count = await LoginLogDao.delete_all(db)
-            return count
+        return await LoginLogDao.delete_all()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import json
+
+from typing import Any
+
+from ..common.principal import UserPrincipal
+from ..common.tree_cache import tree_cache
+from ..crud.crud_menu import MenuDao
+from ..database.db_mysql import scoped_session
+from ..utils.build_tree import get_tree_data, prune_tree
+
+# 侧边栏只展示目录和菜单，不展示按钮
+SIDEBAR_MENU_TYPES = (0, 1)
+
+
+class MenuService:
+    @staticmethod
+    async def get_menu_tree(*, title: str | None = None, status: int | None = None) -> list[dict[str, Any]]:
+        """
+        获取菜单树，按过滤条件缓存，返回的树为共享对象，不要修改
+
+        :param title:
+        :param status:
+        :return:
+        """
+
+        async def load() -> list[dict[str, Any]]:
+            async with scoped_session() as db:
+                menus = await MenuDao.get_all(db, title=title, status=status)
+            return await get_tree_data(menus)
+
+        return await tree_cache.get('menu', json.dumps([title, status]), load)
+
+    @staticmethod
+    async def get_user_menu_tree(principal: UserPrincipal) -> list[dict[str, Any]]:
+        """
+        获取用户的侧边栏菜单树
+
+        从缓存的完整菜单树中按用户的菜单 id 裁剪，不查询数据库
+
+        :param principal:
+        :return:
+        """
+        tree = await MenuService.get_menu_tree()
+        allowed = None if principal.is_superuser else frozenset(principal.menu_ids)
+        return prune_tree(tree, allowed, menu_types=SIDEBAR_MENU_TYPES)
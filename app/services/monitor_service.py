@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import asyncio
+
+from collections import deque
+
+import psutil
+
+from ..common.log import logger as log
+from ..core.conf import settings
+from ..utils.redis_info import redis_info
+from ..utils.server_info import ServerInfo
+from ..utils.timezone import timezone
+
+
+# CPU 使用率基准与首次采样之间的间隔，单位：秒
+PRIME_SECONDS = 0.5
+
+
+class StatusSampler:
+    """
+    服务器和 redis 状态采样
+
+    后台任务每 MONITOR_SAMPLE_INTERVAL 秒刷新一次快照，并将关键指标写入环形缓冲区，
+    状态接口直接返回快照，不再阻塞等待 CPU 采样
+    """
+
+    def __init__(self):
+        self.server: dict | None = None
+        self.redis: dict | None = None
+        self.history: deque[dict] = deque(maxlen=settings.MONITOR_HISTORY_SIZE)
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        # cpu_percent(interval=None) 返回距上次调用的使用率，首次调用作为基准，间隔过短时结果无意义
+        psutil.cpu_percent(interval=None)
+        ServerInfo.get_process().cpu_percent(interval=None)
+        # 启动后尽快采样一次，状态接口不必等待一个完整的采样间隔
+        delay = min(PRIME_SECONDS, settings.MONITOR_SAMPLE_INTERVAL)
+        while True:
+            await asyncio.sleep(delay)
+            delay = settings.MONITOR_SAMPLE_INTERVAL
+            try:
+                await self.sample()
+            except Exception as e:
+                log.error(f'服务器状态采样失败，错误信息：{e}')
+
+    @staticmethod
+    def _sample_server() -> dict:
+        return {
+            'cpu': ServerInfo.get_cpu_info(),
+            'mem': ServerInfo.get_mem_info(),
+            'sys': ServerInfo.get_sys_info(),
+            'disk': ServerInfo.get_disk_info(),
+            'service': ServerInfo.get_service_info(),
+        }
+
+    async def sample(self) -> None:
+        server = await asyncio.to_thread(self._sample_server)
+        redis = await redis_info.get_info()
+        now = timezone.now()
+        self.server = {**server, 'sampled_at': now}
+        self.redis = {**redis, 'sampled_at': now}
+        self.history.append(
+            {
+                'time': now,
+                'cpu_usage': server['cpu']['usage'],
+                'mem_usage': server['mem']['usage'],
+                'process_cpu_usage': float(server['service']['cpu_usage'].rstrip(' %')),
+                'process_rss': ServerInfo.get_process().memory_info().rss,
+                'redis_used_memory': int(redis.get('used_memory', 0)),
+                'redis_connected_clients': int(redis.get('connected_clients', 0)),
+                'redis_ops_per_sec': int(redis.get('instantaneous_ops_per_sec', 0)),
+            }
+        )
+
+
+status_sampler = StatusSampler()
@@ -1,10 +1,20 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import asyncio
+
+from typing import AsyncIterator
+
 from sqlalchemy import Select
 
+from ..common.enums import ExportFormatType
+from ..common.log import logger as log
+from ..core.conf import settings
 from ..crud.crud_opera_log import OperaLogDao
-from app.database.db_mysql import async_db_session
+from app.database.db_mysql import scoped_session
 from ..schemas.opera_log import CreateOperaLog
+from ..utils.request_body import desensitization, parse_body
+from .request_rollup_service import RequestRollupService
+from ..utils.export import stream_export
 
 
 class OperaLogService:
@@ -12,19 +22,143 @@ class OperaLogService:
     async def get_select(*, username: str | None = None, status: int | None = None, ip: str | None = None) -> Select:
         return await OperaLogDao.get_all(username=username, status=status, ip=ip)
 
+    @staticmethod
+    def export(
+        *, fmt: ExportFormatType, username: str | None = None, status: int | None = None, ip: str | None = None
+    ) -> AsyncIterator[bytes]:
+        return stream_export(OperaLogDao.get_export(username=username, status=status, ip=ip), fmt)
+
     @staticmethod
     async def create(*, obj_in: CreateOperaLog):
-        async with async_db_session.begin() as db:
+        async with scoped_session(begin=True) as db:
             await OperaLogDao.create(db, obj_in)
 
+    @staticmethod
+    async def create_many(*, objs_in: list[CreateOperaLog]):
+        async with scoped_session(begin=True) as db:
+            await OperaLogDao.create_many(db, objs_in)
+
     @staticmethod
     async def delete(*, pk: list[int]) -> int:
-        async with async_db_session.begin() as db:
-            count = await OperaLogDao.delete(db, pk)
-            return count
+        # 分批删除，每批单独提交，避免一个大事务长时间持有行锁
+        count = 0
+        size = settings.LOG_DELETE_CHUNK_SIZE
+        for i in range(0, len(pk), size):
+            async with scoped_session(begin=True) as db:
+                count += await OperaLogDao.delete(db, pk[i : i + size])
+        return count
 
     @staticmethod
     async def delete_all() -> int:
-        async with async_db_session.begin() as db:
-            count = await OperaLogDao.delete_all(db)
-            return count
+        return await OperaLogDao.delete_all()
+
+
+class OperaLogQueue:
+    """
+    操作日志缓冲队列
+
+    请求路径上只做入队操作，由后台任务每 OPERA_LOG_BATCH_SIZE 条或每 OPERA_LOG_FLUSH_INTERVAL 秒批量写入数据库
+    """
+
+    def __init__(self):
+        # None 为停止标记，由 stop 放入队列，后台任务处理完之前的日志后退出
+        self._queue: asyncio.Queue[CreateOperaLog | None] = asyncio.Queue(maxsize=settings.OPERA_LOG_QUEUE_MAXSIZE)
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self.dropped = 0
+
+    async def put(self, obj_in: CreateOperaLog) -> None:
+        if settings.OPERA_LOG_QUEUE_OVERFLOW == 'block':
+            await self._queue.put(obj_in)
+            return
+        try:
+            self._queue.put_nowait(obj_in)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                log.warning(f'操作日志队列已满，累计丢弃 {self.dropped} 条')
+
+    def start(self) -> None:
+        self._stopping = False
+        self._task = asyncio.create_task(self._consume())
+
+    async def stop(self) -> None:
+        """
+        停止后台任务，并将队列中剩余的日志全部写入
+
+        不直接取消后台任务，取消可能发生在批量写入过程中，导致已取出的日志丢失
+        """
+        if self._task is not None:
+            if not self._task.done():
+                await self._queue.put(None)
+            try:
+                await self._task
+            except Exception as e:
+                log.error(f'操作日志后台任务异常退出，错误信息：{e}')
+            self._task = None
+        while not self._queue.empty():
+            batch = self._drain([])
+            if batch:
+                await self._write(batch)
+
+    def _drain(self, batch: list[CreateOperaLog]) -> list[CreateOperaLog]:
+        while len(batch) < settings.OPERA_LOG_BATCH_SIZE:
+            try:
+                obj_in = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if obj_in is None:
+                self._stopping = True
+                break
+            batch.append(obj_in)
+        return batch
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            obj_in = await self._queue.get()
+            if obj_in is None:
+                break
+            batch = [obj_in]
+            deadline = loop.time() + settings.OPERA_LOG_FLUSH_INTERVAL
+            while not self._stopping and len(self._drain(batch)) < settings.OPERA_LOG_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    obj_in = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if obj_in is None:
+                    self._stopping = True
+                    break
+                batch.append(obj_in)
+            await self._write(batch)
+
+    @staticmethod
+    async def _prepare(obj_in: CreateOperaLog) -> None:
+        """解析请求体并脱敏"""
+        args = obj_in.args or {}
+        if obj_in.body:
+            args.update(await parse_body(obj_in.body, obj_in.content_type))
+            obj_in.body = None
+        obj_in.args = desensitization(args)
+
+    async def _write(self, batch: list[CreateOperaLog]) -> None:
+        for obj_in in batch:
+            try:
+                await self._prepare(obj_in)
+            except Exception as e:
+                log.error(f'操作日志请求参数解析失败，错误信息：{e}')
+        try:
+            await OperaLogService.create_many(objs_in=batch)
+        except Exception as e:
+            log.error(f'操作日志批量写入失败，丢弃 {len(batch)} 条，错误信息：{e}')
+            return
+        try:
+            await RequestRollupService.ingest(objs_in=batch)
+        except Exception as e:
+            log.error(f'请求统计更新失败，错误信息：{e}')
+
+
+opera_log_queue = OperaLogQueue()
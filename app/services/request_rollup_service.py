@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import asyncio
+import random
+
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import OperationalError
+
+from ..common.enums import RollupGranularityType, StatusType
+from ..common.log import logger as log
+from ..core.conf import settings
+from ..crud.crud_request_rollup import RequestRollupDao
+from ..database.db_mysql import scoped_session
+from ..schemas.opera_log import CreateOperaLog
+from ..schemas.request_rollup import CreateRequestRollup, GetRequestRollupPoint
+from ..utils.sketch import DDSketch
+
+
+# 写入统计时发生死锁（1213）或锁等待超时（1205）的重试次数
+INGEST_DEADLOCK_RETRIES = 3
+
+
+def _is_deadlock(e: OperationalError) -> bool:
+    return bool(getattr(e.orig, 'args', None)) and e.orig.args[0] in (1205, 1213)
+
+
+def truncate_time(dt: datetime, granularity: RollupGranularityType) -> datetime:
+    """截断到时间桶起点"""
+    if granularity == RollupGranularityType.hour:
+        return dt.replace(minute=0, second=0, microsecond=0)
+    return dt.replace(second=0, microsecond=0)
+
+
+class _Bucket:
+    """一个时间桶内的聚合值"""
+
+    __slots__ = ('count', 'error_count', 'cost_sum', 'cost_max', 'sketch')
+
+    def __init__(self):
+        self.count = 0
+        self.error_count = 0
+        self.cost_sum = 0.0
+        self.cost_max = 0.0
+        self.sketch = DDSketch(settings.REQUEST_ROLLUP_SKETCH_ACCURACY)
+
+    def add(self, cost: float, error: bool) -> None:
+        self.count += 1
+        self.error_count += error
+        self.cost_sum += cost
+        self.cost_max = max(self.cost_max, cost)
+        self.sketch.add(cost)
+
+    def merge(self, count: int, error_count: int, cost_sum: float, cost_max: float, sketch: DDSketch) -> None:
+        self.count += count
+        self.error_count += error_count
+        self.cost_sum += cost_sum
+        self.cost_max = max(self.cost_max, cost_max)
+        self.sketch.merge(sketch)
+
+
+class RequestRollupService:
+    @staticmethod
+    async def ingest(*, objs_in: list[CreateOperaLog]) -> None:
+        """
+        将一批操作日志累加到分钟、小时统计中
+
+        先在内存中按时间桶聚合，每个时间桶每批只写一次：计数、耗时通过 ON DUPLICATE KEY UPDATE 在数据库中累加，
+        sketch 在同一事务内锁定行后合并；多个进程并发写入发生死锁时整批重试
+
+        :param objs_in: 操作日志
+        :return:
+        """
+        buckets: dict[tuple[RollupGranularityType, datetime, str, str], _Bucket] = {}
+        for obj_in in objs_in:
+            error = obj_in.status == StatusType.disable
+            for granularity in RollupGranularityType:
+                key = (granularity, truncate_time(obj_in.opera_time, granularity), obj_in.path, obj_in.username or '')
+                bucket = buckets.get(key)
+                if bucket is None:
+                    bucket = buckets[key] = _Bucket()
+                bucket.add(obj_in.cost_time, error)
+        if not buckets:
+            return
+        keys = sorted(buckets)
+        for attempt in range(INGEST_DEADLOCK_RETRIES + 1):
+            try:
+                await RequestRollupService._write_buckets(keys, buckets)
+                return
+            except OperationalError as e:
+                if attempt == INGEST_DEADLOCK_RETRIES or not _is_deadlock(e):
+                    raise
+                log.warning(f'请求统计写入死锁，第 {attempt + 1} 次重试')
+                await asyncio.sleep(random.uniform(0.01, 0.1))
+
+    @staticmethod
+    async def _write_buckets(
+        keys: list[tuple[RollupGranularityType, datetime, str, str]],
+        buckets: dict[tuple[RollupGranularityType, datetime, str, str], _Bucket],
+    ) -> None:
+        objs_in = []
+        for key in keys:
+            granularity, bucket_time, path, username = key
+            bucket = buckets[key]
+            objs_in.append(
+                CreateRequestRollup(
+                    granularity=granularity,
+                    bucket_time=bucket_time,
+                    path=path,
+                    username=username,
+                    count=bucket.count,
+                    error_count=bucket.error_count,
+                    cost_sum=bucket.cost_sum,
+                    cost_max=bucket.cost_max,
+                    sketch=bucket.sketch.to_dict(),
+                )
+            )
+        async with scoped_session(begin=True) as db:
+            # 计数、耗时由数据库累加，写入后这些行已存在且被本事务锁定
+            await RequestRollupDao.upsert_many(db, objs_in)
+            # 合并 sketch：计数等于本批计数的行由本批插入，sketch 已是本批的值
+            sketches = []
+            for granularity in RollupGranularityType:
+                granularity_keys = [key[1:] for key in keys if key[0] == granularity]
+                for row in await RequestRollupDao.get_for_update(db, granularity, granularity_keys):
+                    bucket = buckets[(granularity, row.bucket_time, row.path, row.username)]
+                    if row.count == bucket.count:
+                        continue
+                    sketch = DDSketch.from_dict(row.sketch, relative_accuracy=settings.REQUEST_ROLLUP_SKETCH_ACCURACY)
+                    sketch.merge(bucket.sketch)
+                    sketches.append({'id': row.id, 'sketch': sketch.to_dict()})
+            if sketches:
+                await RequestRollupDao.update_sketches(db, sketches)
+
+    @staticmethod
+    async def get_series(
+        *,
+        granularity: RollupGranularityType,
+        start: datetime,
+        end: datetime,
+        path: str | None = None,
+        username: str | None = None,
+    ) -> list[GetRequestRollupPoint]:
+        """
+        获取请求统计时间序列，只读取统计表；未指定路径或用户时合并同一时间桶的所有行
+
+        :param granularity: 时间粒度
+        :param start: 开始时间
+        :param end: 结束时间
+        :param path: 请求路径
+        :param username: 用户名
+        :return:
+        """
+        async with scoped_session() as db:
+            rows = await RequestRollupDao.get_range(db, granularity, start, end, path=path, username=username)
+        buckets: dict[datetime, _Bucket] = {}
+        for row in rows:
+            bucket = buckets.get(row.bucket_time)
+            if bucket is None:
+                bucket = buckets[row.bucket_time] = _Bucket()
+            bucket.merge(
+                row.count,
+                row.error_count,
+                row.cost_sum,
+                row.cost_max,
+                DDSketch.from_dict(row.sketch, relative_accuracy=settings.REQUEST_ROLLUP_SKETCH_ACCURACY),
+            )
+        return [
+            GetRequestRollupPoint(
+                bucket_time=bucket_time,
+                count=bucket.count,
+                error_count=bucket.error_count,
+                cost_avg=bucket.cost_sum / bucket.count if bucket.count else 0.0,
+                cost_max=bucket.cost_max,
+                p50=bucket.sketch.quantile(0.5),
+                p95=bucket.sketch.quantile(0.95),
+                p99=bucket.sketch.quantile(0.99),
+            )
+            for bucket_time, bucket in buckets.items()
+        ]
+
+    @staticmethod
+    async def purge_minutes(now: datetime) -> int:
+        """分批删除超过保留期的分钟级统计"""
+        before = now - timedelta(days=settings.REQUEST_ROLLUP_MINUTE_RETENTION_DAYS)
+        count = 0
+        while True:
+            async with scoped_session(begin=True) as db:
+                deleted = await RequestRollupDao.delete_before(
+                    db, RollupGranularityType.minute, before, settings.LOG_DELETE_CHUNK_SIZE
+                )
+            count += deleted
+            if deleted < settings.LOG_DELETE_CHUNK_SIZE:
+                return count
@@ -8,7 +8,8 @@ from fastapi import Request, HTTPException, status
 # from app.crud.crud_dept import DeptDao
 # from app.crud.crud_role import RoleDao
 from app.crud.crud_user import USERDAO
-from app.database.db_mysql import async_db_session
+from app.database.db_mysql import scoped_session
+from app.common.principal import UserPrincipal, principal_cache
 from app.models import User
 from passlib.context import CryptContext
 from asgiref.sync import sync_to_async
@@ -23,24 +24,24 @@ from app.services.login_log_service import LoginLogService
 class UserService:
     @staticmethod
     async def register(register_data: UserRegisterSchema) -> None:
-        async with async_db_session.begin() as db:
+        async with scoped_session(begin=True) as db:
             user = await USERDAO.get_user_by_name(db, register_data.username)
             if user:
                 raise HTTPException(status.HTTP_403_FORBIDDEN, "用户已注册")
             nickname = await USERDAO.get_user_by_nickname(db, register_data.nickname)
             if nickname:
                 raise HTTPException(status.HTTP_403_FORBIDDEN, "昵称已存在")
-            register_data.password = hash_password(register_data.password)
+            register_data.password = await hash_password(register_data.password)
             await USERDAO.create(db, **register_data.model_dump())
 
     @staticmethod
     async def login(request: Request, login_data: UserLoginSchema) -> str:
-        async with async_db_session.begin() as db:
+        async with scoped_session(begin=True) as db:
             # 获取对应用户名的 User 对象并与用户传入的账号、密码进行比对，并在比对通过后校验用户账户状态
             user = await USERDAO.get_user_by_name(db, login_data.username)
             if not user:
                 raise HTTPException(status.HTTP_404_NOT_FOUND, "用户不存在")
-            if not password_verify(login_data.password + user.salt, user.password):
+            if not await password_verify(login_data.password + user.salt, user.password):
                 raise HTTPException(status.HTTP_401_UNAUTHORIZED, "密码错误")
             if not user.status:
                 raise HTTPException(status.HTTP_423_LOCKED, "用户已锁定, 登陆失败")
@@ -65,7 +66,7 @@ class UserService:
         :param user_id:
         :return:
         """
-        async with async_db_session.begin() as db:
+        async with scoped_session() as db:
             user = await USERDAO.get_with_relation(db, user_id=user_id)
             if not user.status:
                 raise HTTPException(status.HTTP_423_LOCKED, "用户已锁定")
@@ -80,13 +81,33 @@ class UserService:
                     raise HTTPException(status.HTTP_423_LOCKED, "用户所属角色已锁定")
             return user
 
+    @staticmethod
+    async def get_principal(user_id: int) -> UserPrincipal:
+        """
+        获取经过状态校验的认证主体，优先读取缓存
+        :param user_id:
+        :return:
+        """
+        principal = await principal_cache.get(user_id, UserService._load_principal)
+        principal.check()
+        return principal
+
+    @staticmethod
+    async def _load_principal(user_id: int) -> UserPrincipal:
+        async with scoped_session() as db:
+            # 从主库读取，避免副本延迟导致将更新前的状态写入缓存
+            user = await USERDAO.get_with_relation(db, user_id=user_id, read_replica=False)
+            if not user:
+                raise HTTPException(status.HTTP_404_NOT_FOUND, "用户不存在")
+            return UserPrincipal.from_user(user)
+
     @staticmethod
     async def is_valid(username, password) -> bool:
-        async with async_db_session.begin() as db:
+        async with scoped_session() as db:
             user = await USERDAO.get_user_by_name(db, username)
             if not user:
                 raise HTTPException(status.HTTP_404_NOT_FOUND, "用户不存在")
-            elif not password_verify(password + user.salt, user.password):
+            elif not await password_verify(password + user.salt, user.password):
                 raise HTTPException(status.HTTP_401_UNAUTHORIZED, "密码错误")
             elif not user.status:
                 raise HTTPException(status.HTTP_423_LOCKED, "用户已锁定, 登陆失败")
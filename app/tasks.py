@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+celery 任务
+
+启动：celery -A app.core.celery worker -B -l info
+"""
+import asyncio
+
+from app.core.celery import celery_app
+from app.database.db_mysql import async_engine
+from app.services.log_retention_service import LogRetentionService
+
+
+async def _log_retention() -> dict[str, list[str]]:
+    try:
+        return await LogRetentionService.run()
+    finally:
+        # 每次任务都在新的事件循环中执行，连接不能跨循环复用
+        await async_engine.dispose()
+
+
+@celery_app.task(name='tasks.log_retention')
+def log_retention() -> dict[str, list[str]]:
+    """维护日志分区：创建未来分区，删除过期分区"""
+    return asyncio.run(_log_retention())
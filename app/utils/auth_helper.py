@@ -1,12 +1,16 @@
 """一些辅助身份认证的函数"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import jwt
-from asgiref.sync import sync_to_async
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import status, HTTPException, Depends, Request
 from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.conf import settings
+from app.common.cache import CacheStats, SingleFlight, cache_stats
+from app.common.local_cache import TTLCache
 from app.common.redis import redis_client
 from app.models import User
 from .timezone import timezone
@@ -14,19 +18,50 @@ from ..crud.crud_user import USERDAO
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_schema = OAuth2PasswordBearer(tokenUrl=settings.TOKEN_URL_SWAGGER)
+# 已验证的 token -> 用户 id
+verified_token_cache = TTLCache(settings.TOKEN_CACHE_MAXSIZE)
+token_cache_stats = cache_stats.setdefault("token", CacheStats())
+_token_flight = SingleFlight()
 
 
-@sync_to_async
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+class PasswordExecutor:
+    """
+    bcrypt 专用线程池
+
+    bcrypt 计算期间会释放 GIL，独立线程池即可并行，同时不再占用 sync_to_async 使用的默认线程池；
+    排队任务超过上限时直接返回 429，而不是无限排队
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+
+    async def run(self, func, *args):
+        if self.pending >= self.max_pending:
+            raise HTTPException(status.HTTP_429_TOO_MANY_REQUESTS, "请求过于频繁，请稍后重试")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
 
+password_executor = PasswordExecutor(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
 
-@sync_to_async
-def password_verify(plain_password: str, hashed_password: str) -> bool:
+
+async def hash_password(password: str) -> str:
+    return await password_executor.run(pwd_context.hash, password)
+
+
+async def password_verify(plain_password: str, hashed_password: str) -> bool:
     """
     :return: True if the plain password matches the hashed password, False otherwise.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await password_executor.run(pwd_context.verify, plain_password, hashed_password)
 
 
 async def create_token(
@@ -50,11 +85,11 @@ async def create_token(
         expire_seconds = settings.TOKEN_EXPIRE_SECONDS
     to_encode = {"exp": expire, "sub": sub}
     token = jwt.encode(to_encode, settings.TOKEN_SECRET_KEY, settings.TOKEN_ALGORITHM)
+    index = f"{settings.TOKEN_INDEX_REDIS_PREFIX}:{sub}"
     if multi_login is False:
-        prefix = f"{settings.TOKEN_REDIS_PREFIX}:{sub}:"
-        await redis_client.delete_prefix(prefix)
+        await revoke_tokens(int(sub))
     key = f"{settings.TOKEN_REDIS_PREFIX}:{sub}:{token}"
-    await redis_client.setex(key, expire_seconds, token)
+    await redis_client.set_indexed(index, key, token, expire_seconds)
     return token
 
 
@@ -84,49 +119,105 @@ async def create_refresh_token(
     refresh_token = jwt.encode(
         to_encode, settings.TOKEN_SECRET_KEY, settings.TOKEN_ALGORITHM
     )
+    index = f"{settings.TOKEN_REFRESH_INDEX_REDIS_PREFIX}:{sub}"
     if multi_login is False:
-        prefix = f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}:"
-        await redis_client.delete_prefix(prefix)
+        await redis_client.delete_index(index)
     key = f"{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}:{refresh_token}"
-    await redis_client.setex(key, expire_seconds, refresh_token)
+    await redis_client.set_indexed(index, key, refresh_token, expire_seconds)
     return refresh_token, expire
 
 
-@sync_to_async
-def jwt_decode(token: str) -> int:
+def _decode_token(token: str) -> tuple[int, int]:
     """
-    解码 JWT token 并返回用户 id
+    解码 JWT token 并返回用户 id 和过期时间戳
     :param token: JWT token
-    :return: 用户 id
+    :return: (用户 id, exp)
     """
     try:
-        user_id = int(
-            (
-                jwt.decode(token, settings.TOKEN_SECRET_KEY, [settings.TOKEN_ALGORITHM])
-            ).get("sub")
-        )
+        payload = jwt.decode(token, settings.TOKEN_SECRET_KEY, [settings.TOKEN_ALGORITHM])
+        user_id = int(payload.get("sub"))
         if not user_id:
             raise HTTPException(status.HTTP_401_UNAUTHORIZED, "token 无效！")
     except jwt.ExpiredSignatureError:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "token 已过期！")
     except (jwt.JWTError, Exception):
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "token 无效！")
-    return user_id
+    return user_id, int(payload.get("exp"))
+
+
+def jwt_decode(token: str) -> int:
+    """
+    解码 JWT token 并返回用户 id
+    :param token: JWT token
+    :return: 用户 id
+    """
+    return _decode_token(token)[0]
 
 
 async def get_user_id_by_token(token: str) -> int:
     """
     返回 token 中包含的用户 id。
+
+    验证通过的 token 会在进程内缓存，缓存时间不超过 token 自身的过期时间和 TOKEN_CACHE_TTL_SECONDS，
+    token 注销时通过 redis pub/sub 通知所有进程清除缓存
     :param token: JWT token
     :return: 用户 id。
     """
-    user_id = await jwt_decode(token)
+    user_id = verified_token_cache.get(token)
+    if user_id is not None:
+        token_cache_stats.local_hits += 1
+        return user_id
+    token_cache_stats.misses += 1
+    # 同一 token 的并发请求只校验一次
+    return await _token_flight.do(token, lambda: _verify_token(token))
+
+
+async def _verify_token(token: str) -> int:
+    token_cache_stats.loads += 1
+    user_id, exp = _decode_token(token)
     key = f"{settings.TOKEN_REDIS_PREFIX}:{user_id}:{token}"
     if not await redis_client.get(key):
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "token 已过期")
+    verified_token_cache.set(token, user_id, min(exp - time.time(), settings.TOKEN_CACHE_TTL_SECONDS))
     return user_id
 
 
+def _evict_tokens(message: str) -> None:
+    """根据注销消息清除本地缓存，消息格式为 <user_id> 或 <user_id>:<token>"""
+    user_id, _, token = message.partition(":")
+    if token:
+        verified_token_cache.pop(token)
+    else:
+        user_id = int(user_id)
+        verified_token_cache.pop_where(lambda _, value: value == user_id)
+
+
+async def revoke_tokens(user_id: int, token: str | None = None) -> None:
+    """
+    注销用户 token，并通知所有进程清除本地缓存
+
+    :param user_id: 用户 id
+    :param token: 指定注销的 token，为空时注销该用户的全部 token
+    :return:
+    """
+    index = f"{settings.TOKEN_INDEX_REDIS_PREFIX}:{user_id}"
+    if token:
+        await redis_client.delete_indexed(index, f"{settings.TOKEN_REDIS_PREFIX}:{user_id}:{token}")
+        message = f"{user_id}:{token}"
+    else:
+        await redis_client.delete_index(index)
+        message = str(user_id)
+    _evict_tokens(message)
+    await redis_client.publish(settings.TOKEN_REVOKE_CHANNEL, message)
+
+
+async def token_revoke_listener() -> None:
+    """订阅 token 注销消息，在应用生命周期内作为后台任务运行"""
+    await redis_client.subscribe_forever(
+        settings.TOKEN_REVOKE_CHANNEL, _evict_tokens, on_reset=verified_token_cache.clear
+    )
+
+
 def get_authorization_scheme_param(
     authorization_header_value: str | None,
 ) -> (str, str):
@@ -155,7 +246,6 @@ async def get_current_user(db: AsyncSession, user_id: int) -> User:
     return user
 
 
-@sync_to_async
 def get_token(request: Request) -> str:
     """
     Get token for request header
@@ -172,3 +262,23 @@ def get_token(request: Request) -> str:
 # JWT authorizes dependency injection, which can be used if the interface only
 # needs to provide a token instead of RBAC permission control
 DependsJwtAuth = Depends(oauth2_schema)
+
+
+async def superuser_verify(token: str = DependsJwtAuth) -> int:
+    """
+    校验 token 及用户状态，并要求用户为超级管理员，用于导出审计数据、修改全局开关等接口
+
+    :param token: JWT token
+    :return: 用户 id
+    """
+    # 避免循环导入：user_service 依赖本模块
+    from app.services.user_service import UserService
+
+    user_id = await get_user_id_by_token(token)
+    principal = await UserService.get_principal(user_id)
+    if not principal.is_superuser:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "仅超级管理员可以执行此操作")
+    return user_id
+
+
+DependsSuperUser = Depends(superuser_verify)
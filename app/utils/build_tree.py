@@ -1,21 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-from typing import Any, Sequence
+from typing import Any, Iterable, Sequence
 
-from asgiref.sync import sync_to_async
+from ..common.enums import BuildTreeType
+from .serializers import RowData, select_list_serialize
 
-from common.enums import BuildTreeType
-from utils.serializers import RowData, select_list_serialize
 
-
-async def get_tree_nodes(row: Sequence[RowData]) -> list[dict[str, Any]]:
+def get_tree_nodes(row: Sequence[RowData]) -> list[dict[str, Any]]:
     """获取所有树形结构节点"""
-    tree_nodes = await select_list_serialize(row)
+    tree_nodes = select_list_serialize(row)
     tree_nodes.sort(key=lambda x: x['sort'])
     return tree_nodes
 
 
-@sync_to_async
 def traversal_to_tree(nodes: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """
     通过遍历算法构造树形结构
@@ -40,24 +37,59 @@ def traversal_to_tree(nodes: list[dict[str, Any]]) -> list[dict[str, Any]]:
     return tree
 
 
-async def recursive_to_tree(nodes: list[dict[str, Any]], *, parent_id: int | None = None) -> list[dict[str, Any]]:
+def recursive_to_tree(nodes: list[dict[str, Any]], *, parent_id: int | None = None) -> list[dict[str, Any]]:
     """
-    通过递归算法构造树形结构
+    以 parent_id 为根构造树形结构
+
+    先按 parent_id 分组，再用栈自顶向下挂载子节点，时间复杂度 O(n)，不受树深度的递归限制
 
     :param nodes:
     :param parent_id:
     :return:
     """
-    tree = []
+    children_map: dict[int | None, list[dict[str, Any]]] = {}
     for node in nodes:
-        if node['parent_id'] == parent_id:
-            child_node = await recursive_to_tree(nodes, parent_id=node['id'])
-            if child_node:
-                node['children'] = child_node
-            tree.append(node)
+        children_map.setdefault(node['parent_id'], []).append(node)
+    tree = children_map.get(parent_id, [])
+    stack = list(tree)
+    while stack:
+        node = stack.pop()
+        children = children_map.get(node['id'])
+        if children:
+            node['children'] = children
+            stack.extend(children)
     return tree
 
 
+def prune_tree(
+    tree: Iterable[dict[str, Any]], allowed: frozenset[int] | None, *, menu_types: tuple[int, ...] | None = None
+) -> list[dict[str, Any]]:
+    """
+    按允许的 id 裁剪树，返回新的树，不修改原树
+
+    节点的父节点被裁剪时，节点也一并裁剪，与由过滤后的节点构造树的结果一致
+
+    :param tree: 完整的树
+    :param allowed: 允许的 id 集合，为空时不按 id 裁剪
+    :param menu_types: 允许的菜单类型，为空时不按类型裁剪
+    :return:
+    """
+    result = []
+    for node in tree:
+        if allowed is not None and node['id'] not in allowed:
+            continue
+        if menu_types is not None and node.get('menu_type') not in menu_types:
+            continue
+        new_node = {k: v for k, v in node.items() if k != 'children'}
+        children = node.get('children')
+        if children:
+            pruned = prune_tree(children, allowed, menu_types=menu_types)
+            if pruned:
+                new_node['children'] = pruned
+        result.append(new_node)
+    return result
+
+
 async def get_tree_data(
     row: Sequence[RowData], build_type: BuildTreeType = BuildTreeType.traversal, *, parent_id: int | None = None
 ) -> list[dict[str, Any]]:
@@ -69,12 +101,12 @@ async def get_tree_data(
     :param parent_id:
     :return:
     """
-    nodes = await get_tree_nodes(row)
+    nodes = get_tree_nodes(row)
     match build_type:
         case BuildTreeType.traversal:
-            tree = await traversal_to_tree(nodes)
+            tree = traversal_to_tree(nodes)
         case BuildTreeType.recursive:
-            tree = await recursive_to_tree(nodes, parent_id=parent_id)
+            tree = recursive_to_tree(nodes, parent_id=parent_id)
         case _:
             raise ValueError(f'无效的算法类型：{build_type}')
     return tree
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大表流式导出
+
+通过 AsyncSession.stream() 使用服务端游标逐批读取，边读边编码为 NDJSON 或 CSV，内存占用与表大小无关
+"""
+import csv
+import io
+import json
+
+from datetime import datetime
+from typing import Any, AsyncIterator
+
+from sqlalchemy import Select
+
+from ..common.enums import ExportFormatType
+from ..core.conf import settings
+from ..database.db_mysql import READ_REPLICA, async_db_session
+from .serializers import json_dumps
+
+# 每批从游标读取的行数
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormatType.ndjson: 'application/x-ndjson',
+    ExportFormatType.csv: 'text/csv; charset=utf-8',
+}
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.strftime(settings.DATETIME_FORMAT)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+async def stream_scalars(stmt: Select) -> AsyncIterator[Any]:
+    """
+    通过服务端游标逐个读取 ORM 查询结果，使用独立的会话，不占用请求会话的连接
+
+    :param stmt: ORM 查询语句
+    :return:
+    """
+    stmt = stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE, **READ_REPLICA)
+    async with async_db_session() as db:
+        result = await db.stream_scalars(stmt)
+        async for obj in result:
+            yield obj
+
+
+async def stream_export(stmt: Select, fmt: ExportFormatType) -> AsyncIterator[bytes]:
+    """
+    流式导出查询结果
+
+    使用独立的会话，不占用请求会话的连接
+
+    :param stmt: 按列查询的语句，E.g. select(*Model.__table__.columns)
+    :param fmt: 导出格式
+    :return:
+    """
+    stmt = stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE, **READ_REPLICA)
+    async with async_db_session() as db:
+        result = await db.stream(stmt)
+        fields = list(result.keys())
+        if fmt == ExportFormatType.csv:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            # BOM 便于 Excel 识别 utf-8
+            yield '\ufeff'.encode('utf-8')
+            writer.writerow(fields)
+            async for rows in result.partitions():
+                for row in rows:
+                    writer.writerow([_csv_value(value) for value in row])
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate(0)
+            if buffer.tell():
+                yield buffer.getvalue().encode('utf-8')
+        else:
+            async for rows in result.partitions():
+                yield b''.join(json_dumps(dict(zip(fields, row))) + b'\n' for row in rows)
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-from common.redis import redis_client
-from utils.server_info import server_info
+from ..common.redis import redis_client
+from .server_info import server_info
 
 
 class RedisInfo:
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+操作日志请求体采集
+
+中间件只在应用读取请求体时顺带记录原始字节，不额外读取或解析；解析和脱敏由操作日志后台任务完成
+"""
+import hashlib
+import json
+
+from typing import Any
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import Headers, UploadFile
+from starlette.formparsers import MultiPartParser
+
+from ..common.enums import OperaLogCipherType
+from ..core.conf import settings
+from .encrypt import AESCipher, ItsDCipher, Md5Cipher
+
+
+def _media_type(content_type: str | None) -> str:
+    return (content_type or '').split(';', 1)[0].strip().lower()
+
+
+class BodyCapture:
+    """
+    请求体采集
+
+    - 内容类型在 OPERA_LOG_BODY_CONTENT_TYPES 中且不超过 OPERA_LOG_BODY_MAX_SIZE 时保留原始字节，稍后解析
+    - 其他情况只记录大小和前 OPERA_LOG_BODY_HASH_BYTES 字节的 sha256，请求体原样透传
+    """
+
+    __slots__ = ('content_type', 'capture', 'buffer', 'size', 'digest', 'hashed')
+
+    def __init__(self, content_type: str | None, content_length: str | None):
+        self.content_type = content_type
+        self.capture = _media_type(content_type) in settings.OPERA_LOG_BODY_CONTENT_TYPES and (
+            content_length is None
+            or not content_length.isdigit()
+            or int(content_length) <= settings.OPERA_LOG_BODY_MAX_SIZE
+        )
+        self.buffer = bytearray()
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.hashed = 0
+
+    def feed(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self.size += len(chunk)
+        if self.capture:
+            if self.size <= settings.OPERA_LOG_BODY_MAX_SIZE:
+                self.buffer += chunk
+                return
+            # 超出大小上限，放弃保留，改为摘要
+            self.capture = False
+            self._hash(bytes(self.buffer))
+            self.buffer = bytearray()
+        self._hash(chunk)
+
+    def _hash(self, chunk: bytes) -> None:
+        remaining = settings.OPERA_LOG_BODY_HASH_BYTES - self.hashed
+        if remaining > 0:
+            part = chunk[:remaining]
+            self.digest.update(part)
+            self.hashed += len(part)
+
+    @property
+    def body(self) -> bytes | None:
+        """保留的原始请求体"""
+        return bytes(self.buffer) if self.capture and self.size else None
+
+    @property
+    def summary(self) -> dict[str, Any] | None:
+        """未保留的请求体摘要"""
+        if self.capture or not self.size:
+            return None
+        return {
+            'content_type': self.content_type,
+            'size': self.size,
+            'sha256': self.digest.hexdigest(),
+            'hashed_bytes': self.hashed,
+        }
+
+
+async def parse_body(body: bytes, content_type: str | None) -> dict[str, Any]:
+    """
+    解析请求体为参数字典
+
+    解析失败时只记录大小和摘要，与未保留的请求体一致；原始内容可能包含无法按键名脱敏的敏感信息，不能直接落库
+
+    :param body: 原始请求体
+    :param content_type: 请求内容类型
+    :return:
+    """
+    media_type = _media_type(content_type)
+    try:
+        if media_type == 'application/json':
+            data = json.loads(body)
+            return data if isinstance(data, dict) else {f'{type(data)}_to_dict_data': data}
+        if media_type == 'application/x-www-form-urlencoded':
+            return dict(parse_qsl(body.decode('latin-1'), keep_blank_values=True))
+        if media_type == 'multipart/form-data':
+
+            async def stream():
+                yield body
+
+            form = await MultiPartParser(Headers({'content-type': content_type}), stream()).parse()
+            try:
+                return {k: v.filename if isinstance(v, UploadFile) else v for k, v in form.items()}
+            finally:
+                await form.close()
+    except Exception:
+        pass
+    part = body[: settings.OPERA_LOG_BODY_HASH_BYTES]
+    return {
+        '__body__': {
+            'content_type': content_type,
+            'size': len(body),
+            'sha256': hashlib.sha256(part).hexdigest(),
+            'hashed_bytes': len(part),
+        }
+    }
+
+
+def desensitization(args: dict) -> dict | None:
+    if len(args) > 0:
+        match settings.OPERA_LOG_ENCRYPT:
+            case OperaLogCipherType.aes:
+                for key in args.keys():
+                    if key in settings.OPERA_LOG_ENCRYPT_INCLUDE:
+                        args[key] = (AESCipher(settings.OPERA_LOG_ENCRYPT_SECRET_KEY).encrypt(args[key])).hex()
+            case OperaLogCipherType.md5:
+                for key in args.keys():
+                    if key in settings.OPERA_LOG_ENCRYPT_INCLUDE:
+                        args[key] = Md5Cipher.encrypt(args[key])
+            case OperaLogCipherType.itsdangerous:
+                for key in args.keys():
+                    if key in settings.OPERA_LOG_ENCRYPT_INCLUDE:
+                        args[key] = ItsDCipher(settings.OPERA_LOG_ENCRYPT_SECRET_KEY).encrypt(args[key])
+            case OperaLogCipherType.plan:
+                pass
+            case _:
+                for key in args.keys():
+                    if key in settings.OPERA_LOG_ENCRYPT_INCLUDE:
+                        args[key] = '******'
+    return args if len(args) > 0 else None
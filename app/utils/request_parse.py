@@ -1,5 +1,10 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import mmap
+import time
+
+from typing import Iterable
+
 import httpx
 
 from asgiref.sync import sync_to_async
@@ -7,13 +12,80 @@ from fastapi import Request
 from user_agents import parse
 from XdbSearchIP.xdbSearcher import XdbSearcher
 
+from ..common.cache import Expiring, RedisCache, SingleFlight
+from ..common.local_cache import TTLCache
 from ..common.log import logger as log
-from ..common.redis import redis_client
 from ..core.conf import settings
 from ..core.path_conf import IP2REGION_XDB
 
+# ip -> [country, region, city]
+ip_location_cache = RedisCache(
+    'ip_location',
+    settings.IP_LOCATION_REDIS_PREFIX,
+    settings.IP_LOCATION_EXPIRE_SECONDS,
+    stale_ttl=settings.IP_LOCATION_STALE_SECONDS,
+    lock_timeout=settings.IP_LOCATION_LOCK_TIMEOUT,
+    local_maxsize=settings.IP_LOCATION_CACHE_MAXSIZE,
+    local_ttl=settings.IP_LOCATION_CACHE_TTL_SECONDS,
+)
+_xdb_searcher: XdbSearcher | None = None
+
+
+class CircuitBreaker:
+    """连续失败达到阈值后熔断一段时间，熔断结束后放行请求试探服务是否恢复"""
+
+    __slots__ = ('threshold', 'reset_seconds', 'failures', 'open_until')
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.open_until = 0.0
+
+    def allow(self) -> bool:
+        return self.open_until <= time.monotonic()
+
+    def record_success(self) -> None:
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.open_until = time.monotonic() + self.reset_seconds
+            self.failures = 0
+            log.warning(f'在线获取 ip 地址属地连续失败，{self.reset_seconds} 秒内改用离线解析')
+
+
+_http_client: httpx.AsyncClient | None = None
+_online_flight = SingleFlight()
+# 在线查询失败的 ip
+_online_negative_cache = TTLCache(settings.IP_LOCATION_CACHE_MAXSIZE)
+_online_breaker = CircuitBreaker(
+    settings.IP_LOCATION_ONLINE_BREAKER_THRESHOLD, settings.IP_LOCATION_ONLINE_BREAKER_SECONDS
+)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取共享的 http 客户端，复用 keep-alive 连接"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=settings.IP_LOCATION_ONLINE_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.IP_LOCATION_ONLINE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.IP_LOCATION_ONLINE_MAX_CONNECTIONS,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
-@sync_to_async
 def get_request_ip(request: Request) -> str:
     """获取请求的 ip 地址"""
     real = request.headers.get('X-Real-IP')
@@ -35,23 +107,62 @@ async def get_location_online(ip: str, user_agent: str) -> dict | None:
     """
     在线获取 ip 地址属地，无法保证可用性，准确率较高
 
+    - 同一 ip 的并发查询只发出一个请求
+    - 查询失败的 ip 会在一段时间内直接使用离线解析
+    - 连续失败时熔断，熔断期间全部使用离线解析
+
     :param ip:
     :param user_agent:
     :return:
     """
-    async with httpx.AsyncClient(timeout=3) as client:
-        ip_api_url = f'http://ip-api.com/json/{ip}?lang=zh-CN'
-        headers = {'User-Agent': user_agent}
-        try:
-            response = await client.get(ip_api_url, headers=headers)
-            if response.status_code == 200:
-                return response.json()
-        except Exception as e:
-            log.error(f'在线获取 ip 地址属地失败，错误信息：{e}')
-            return None
+    location = await _get_location_online(ip, user_agent)
+    return location if location is not None else get_location_offline(ip)
+
+
+async def _get_location_online(ip: str, user_agent: str) -> dict | None:
+    """在线获取 ip 地址属地，查询失败或熔断时返回 None"""
+    if _online_negative_cache.get(ip) or not _online_breaker.allow():
+        return None
+    return await _online_flight.do(ip, lambda: _fetch_location_online(ip, user_agent))
+
+
+async def _fetch_location_online(ip: str, user_agent: str) -> dict | None:
+    ip_api_url = f'http://ip-api.com/json/{ip}?lang=zh-CN'
+    headers = {'User-Agent': user_agent}
+    try:
+        response = await get_http_client().get(ip_api_url, headers=headers)
+    except Exception as e:
+        log.error(f'在线获取 ip 地址属地失败，错误信息：{e}')
+        _online_breaker.record_failure()
+        _online_negative_cache.set(ip, True, settings.IP_LOCATION_ONLINE_NEGATIVE_TTL_SECONDS)
+        return None
+    if response.status_code != 200:
+        _online_breaker.record_failure()
+        _online_negative_cache.set(ip, True, settings.IP_LOCATION_ONLINE_NEGATIVE_TTL_SECONDS)
+        return None
+    _online_breaker.record_success()
+    data = response.json()
+    # 内网等无法解析的 ip 返回 status=fail，属于正常响应
+    if data.get('status') == 'fail':
+        _online_negative_cache.set(ip, True, settings.IP_LOCATION_ONLINE_NEGATIVE_TTL_SECONDS)
+        return None
+    return data
+
+
+def get_xdb_searcher() -> XdbSearcher:
+    """
+    获取进程内共享的 xdb 查询器
+
+    xdb 文件以只读方式 mmap 到内存，多个 worker 进程共享同一份系统页缓存，查询时不再读取文件
+    """
+    global _xdb_searcher
+    if _xdb_searcher is None:
+        with open(IP2REGION_XDB, 'rb') as f:
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _xdb_searcher = XdbSearcher(contentBuff=content)
+    return _xdb_searcher
 
 
-@sync_to_async
 def get_location_offline(ip: str) -> dict | None:
     """
     离线获取 ip 地址属地，无法保证准确率，100%可用
@@ -60,10 +171,7 @@ def get_location_offline(ip: str) -> dict | None:
     :return:
     """
     try:
-        cb = XdbSearcher.loadContentFromFile(dbfile=IP2REGION_XDB)
-        searcher = XdbSearcher(contentBuff=cb)
-        data = searcher.search(ip)
-        searcher.close()
+        data = get_xdb_searcher().search(ip)
         data = data.split('|')
         return {
             'country': data[0] if data[0] != '0' else None,
@@ -75,29 +183,42 @@ def get_location_offline(ip: str) -> dict | None:
         return None
 
 
+def get_locations_offline(ips: Iterable[str]) -> dict[str, dict | None]:
+    """
+    离线批量获取 ip 地址属地，用于日志回填等场景
+
+    :param ips:
+    :return: ip -> 属地信息
+    """
+    return {ip: get_location_offline(ip) for ip in set(ips)}
+
+
 async def parse_ip_info(request: Request) -> tuple[str, str, str, str]:
-    country, region, city = None, None, None
-    ip = await get_request_ip(request)
-    location = await redis_client.get(f'{settings.IP_LOCATION_REDIS_PREFIX}:{ip}')
-    if location:
-        country, region, city = location.split(' ')
-        return ip, country, region, city
+    ip = get_request_ip(request)
+    user_agent = request.headers.get('User-Agent')
+    location = await ip_location_cache.get_or_load(ip, lambda: _load_ip_location(ip, user_agent))
+    country, region, city = location or (None, None, None)
+    return ip, country, region, city
+
+
+async def _load_ip_location(ip: str, user_agent: str) -> list | Expiring | None:
     if settings.LOCATION_PARSE == 'online':
-        location_info = await get_location_online(ip, request.headers.get('User-Agent'))
+        location_info = await _get_location_online(ip, user_agent)
+        if location_info is None:
+            # 在线查询失败时的离线结果只短暂缓存，之后重新尝试在线查询
+            location = _to_location(get_location_offline(ip))
+            return Expiring(location, settings.IP_LOCATION_ONLINE_NEGATIVE_TTL_SECONDS) if location else None
     elif settings.LOCATION_PARSE == 'offline':
-        location_info = await get_location_offline(ip)
+        location_info = get_location_offline(ip)
     else:
         location_info = None
-    if location_info:
-        country = location_info.get('country')
-        region = location_info.get('regionName')
-        city = location_info.get('city')
-        await redis_client.set(
-            f'{settings.IP_LOCATION_REDIS_PREFIX}:{ip}',
-            f'{country} {region} {city}',
-            ex=settings.IP_LOCATION_EXPIRE_SECONDS,
-        )
-    return ip, country, region, city
+    return _to_location(location_info)
+
+
+def _to_location(location_info: dict | None) -> list | None:
+    if not location_info:
+        return None
+    return [location_info.get('country'), location_info.get('regionName'), location_info.get('city')]
 
 
 @sync_to_async
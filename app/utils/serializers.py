@@ -1,17 +1,49 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+from datetime import date, datetime
 from decimal import Decimal
-from typing import Any, Sequence, TypeVar
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Sequence, TypeVar
 
-from asgiref.sync import sync_to_async
-from sqlalchemy import Row, RowMapping
+from sqlalchemy import Numeric, Row, RowMapping
+
+from app.core.conf import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+    import json
 
 RowData = Row | RowMapping | Any
 
 R = TypeVar('R', bound=RowData)
 
 
-@sync_to_async
+@lru_cache(maxsize=None)
+def _column_accessor(model: type) -> tuple[tuple[str, ...], Callable[[Any], tuple], tuple[int, ...]]:
+    """
+    Compile the column accessor of a model once: column keys, a getter returning all column values as a tuple
+    and the positions of Numeric columns
+
+    :param model:
+    :return:
+    """
+    columns = tuple(model.__table__.columns)
+    keys = tuple(column.key for column in columns)
+    getter = attrgetter(*keys)
+    if len(keys) == 1:
+        single = getter
+        getter = lambda row: (single(row),)  # noqa: E731
+    decimal_positions = tuple(i for i, column in enumerate(columns) if isinstance(column.type, Numeric))
+    return keys, getter, decimal_positions
+
+
+def _decimal(val: Any) -> Any:
+    return float(val) if isinstance(val, Decimal) else val
+
+
 def select_columns_serialize(row: R) -> dict:
     """
     Serialize SQLAlchemy select table columns, does not contain relational columns
@@ -19,29 +51,48 @@ def select_columns_serialize(row: R) -> dict:
     :param row:
     :return:
     """
-    obj_dict = {}
-    for column in row.__table__.columns.keys():
-        val = getattr(row, column)
-        if isinstance(val, Decimal):
-            if val % 1 == 0:
-                val = int(val)
-            val = float(val)
-        obj_dict[column] = val
-    return obj_dict
+    keys, getter, decimal_positions = _column_accessor(type(row))
+    values = getter(row)
+    if decimal_positions:
+        values = list(values)
+        for i in decimal_positions:
+            values[i] = _decimal(values[i])
+    return dict(zip(keys, values))
 
 
-async def select_list_serialize(row: Sequence[R]) -> list:
+def select_list_serialize(row: Sequence[R]) -> list:
     """
     Serialize SQLAlchemy select list
 
     :param row:
     :return:
     """
-    ret_list = [await select_columns_serialize(_) for _ in row]
-    return ret_list
+    if not row:
+        return []
+    keys, getter, decimal_positions = _column_accessor(type(row[0]))
+    if not decimal_positions:
+        return [dict(zip(keys, getter(_))) for _ in row]
+    return [select_columns_serialize(_) for _ in row]
+
+
+def select_rows_serialize(rows: Sequence[Row]) -> list[dict]:
+    """
+    Serialize core select() result rows directly, without ORM hydration
+
+    E.g. ::
+
+        result = await db.execute(select(Menu.id, Menu.name, Menu.parent_id))
+        data = select_rows_serialize(result.all())
+
+    :param rows:
+    :return:
+    """
+    if not rows:
+        return []
+    fields = rows[0]._fields
+    return [dict(zip(fields, _)) for _ in rows]
 
 
-@sync_to_async
 def select_as_dict(row: R) -> dict:
     """
     Converting select to dict, which can contain relational data, depends on the properties of the select object itself
@@ -53,3 +104,45 @@ def select_as_dict(row: R) -> dict:
     if '_sa_instance_state' in obj_dict:
         del obj_dict['_sa_instance_state']
         return obj_dict
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        return obj.strftime(settings.DATETIME_FORMAT)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if hasattr(obj, 'model_dump'):
+        # python 模式保留 datetime，由本函数按 DATETIME_FORMAT 格式化
+        return obj.model_dump()
+    if hasattr(obj, '__table__'):
+        return select_columns_serialize(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def json_dumps(obj: Any) -> bytes:
+    """
+    Serialize to JSON bytes in one pass, skipping jsonable_encoder
+
+    Uses orjson when installed, datetime is formatted with settings.DATETIME_FORMAT, ORM objects are serialized by
+    their table columns
+
+    :param obj:
+    :return:
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(obj, default=_json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def select_list_serialize_json(row: Sequence[R]) -> bytes:
+    """
+    Serialize SQLAlchemy select list directly to JSON bytes
+
+    :param row:
+    :return:
+    """
+    return json_dumps(select_list_serialize(row))
@@ -5,14 +5,31 @@ import sys
 
 from datetime import datetime, timedelta
 from datetime import timezone as tz
+from functools import lru_cache
 from typing import List
 
 import psutil
 
-from utils.timezone import timezone
+from .timezone import timezone
 
 
 class ServerInfo:
+    """
+    服务器信息
+
+    CPU 使用率均以非阻塞方式获取，即距上一次调用以来的使用率，由 StatusSampler 定时调用
+    """
+
+    _process: psutil.Process | None = None
+
+    @staticmethod
+    def get_process() -> psutil.Process:
+        """当前进程，首次使用时创建；预先 fork 的 worker 中 pid 与主进程不同，会重新创建"""
+        process = ServerInfo._process
+        if process is None or process.pid != os.getpid():
+            process = ServerInfo._process = psutil.Process(os.getpid())
+        return process
+
     @staticmethod
     def format_bytes(size) -> str:
         """格式化字节"""
@@ -51,7 +68,7 @@ class ServerInfo:
     @staticmethod
     def get_cpu_info() -> dict:
         """获取 CPU 信息"""
-        cpu_info = {'usage': round(psutil.cpu_percent(interval=1, percpu=False), 2)}  # %
+        cpu_info = {'usage': round(psutil.cpu_percent(interval=None, percpu=False), 2)}  # %
 
         # CPU 频率信息，最大、最小和当前频率
         cpu_freq = psutil.cpu_freq()
@@ -76,13 +93,14 @@ class ServerInfo:
         }
 
     @staticmethod
+    @lru_cache
     def get_sys_info() -> dict:
-        """获取服务器信息"""
+        """获取服务器信息，进程内只获取一次"""
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sk:
                 sk.connect(('8.8.8.8', 80))
                 ip = sk.getsockname()[0]
-        except socket.gaierror:
+        except OSError:
             ip = '127.0.0.1'
         return {'name': socket.gethostname(), 'ip': ip, 'os': platform.system(), 'arch': platform.machine()}
 
@@ -108,14 +126,14 @@ class ServerInfo:
     @staticmethod
     def get_service_info():
         """获取服务信息"""
-        process = psutil.Process(os.getpid())
+        process = ServerInfo.get_process()
         mem_info = process.memory_info()
         start_time = timezone.f_datetime(datetime.utcfromtimestamp(process.create_time()).replace(tzinfo=tz.utc))
         return {
             'name': 'Python3',
             'version': platform.python_version(),
             'home': sys.executable,
-            'cpu_usage': f'{round(process.cpu_percent(interval=1), 2)} %',
+            'cpu_usage': f'{round(process.cpu_percent(interval=None), 2)} %',
             'mem_vms': ServerInfo.format_bytes(mem_info.vms),  # 虚拟内存, 即当前进程申请的虚拟内存
             'mem_rss': ServerInfo.format_bytes(mem_info.rss),  # 常驻内存, 即当前进程实际使用的物理内存
             'mem_free': ServerInfo.format_bytes(mem_info.vms - mem_info.rss),  # 空闲内存
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DDSketch 分位数估计
+
+按对数划分桶，分位数的相对误差不超过 relative_accuracy；两个 sketch 按桶相加即可合并，
+因此分钟级统计可以直接合并为小时级或任意时间段的统计
+
+参考：https://arxiv.org/abs/1908.10693
+"""
+import math
+
+from typing import Any
+
+
+class DDSketch:
+    __slots__ = ('relative_accuracy', 'max_bins', 'gamma', '_log_gamma', 'bins', 'zero_count', 'count')
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float, count: int = 1) -> None:
+        self.count += count
+        if value <= 0:
+            self.zero_count += count
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[index] = self.bins.get(index, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def merge(self, other: 'DDSketch') -> None:
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def quantile(self, q: float) -> float | None:
+        """
+        估计分位数
+
+        :param q: 0 ~ 1
+        :return: 没有数据时返回 None
+        """
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                return 2 * self.gamma**index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def _collapse(self) -> None:
+        """桶数超过上限时合并最小的桶，只影响低分位数的精度"""
+        indexes = sorted(self.bins)
+        overflow = len(indexes) - self.max_bins + 1
+        target = indexes[overflow]
+        self.bins[target] += sum(self.bins.pop(index) for index in indexes[:overflow])
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'z': self.zero_count, 'b': {str(index): count for index, count in self.bins.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None, **kwargs) -> 'DDSketch':
+        sketch = cls(**kwargs)
+        if data:
+            sketch.zero_count = data.get('z', 0)
+            sketch.bins = {int(index): count for index, count in data.get('b', {}).items()}
+            sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        return sketch
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对比 sync_to_async 线程池切换与直接调用的开销
+
+在项目根目录执行：python benchmarks/sync_to_async_overhead.py
+
+- hop: 对空函数调用一次的耗时，即每个被 sync_to_async 包装的小函数在每次请求中额外付出的开销
+- serialize: 序列化 1000 行数据，原实现对每一行都切换一次线程
+"""
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from app.utils.serializers import select_columns_serialize, select_list_serialize
+
+ROWS = 1000
+ROUNDS = 20
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Sample(Base):
+    __tablename__ = 'sample'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(64))
+    description: Mapped[str] = mapped_column(String(256))
+    field_type: Mapped[str] = mapped_column(String(32))
+    sort: Mapped[int] = mapped_column(Integer)
+
+
+def noop() -> None:
+    pass
+
+
+async def bench(label: str, func, rounds: int = ROUNDS) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await func()
+    cost = (time.perf_counter() - start) / rounds * 1000
+    print(f'{label:<32}{cost:>10.3f} ms')
+    return cost
+
+
+async def main():
+    rows = [Sample(id=i, name=f'case_{i}', description='x' * 64, field_type='String', sort=i) for i in range(ROWS)]
+    wrapped_noop = sync_to_async(noop)
+    wrapped_serialize = sync_to_async(select_columns_serialize)
+
+    async def hop_before():
+        await wrapped_noop()
+
+    async def hop_after():
+        noop()
+
+    async def serialize_before():
+        [await wrapped_serialize(row) for row in rows]
+
+    async def serialize_after():
+        select_list_serialize(rows)
+
+    print(f'rounds={ROUNDS}, rows={ROWS}')
+    before = await bench('hop (sync_to_async)', hop_before, ROUNDS * 100)
+    after = await bench('hop (inline)', hop_after, ROUNDS * 100)
+    print(f'{"per call saved":<32}{before - after:>10.3f} ms')
+    before = await bench('serialize (sync_to_async)', serialize_before)
+    after = await bench('serialize (inline)', serialize_after)
+    print(f'{"per list saved":<32}{before - after:>10.3f} ms')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
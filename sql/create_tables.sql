@@ -89,11 +89,14 @@ CREATE TABLE sys_login_log
     msg          LONGTEXT     NOT NULL COMMENT '提示消息',
     login_time   DATETIME     NOT NULL COMMENT '登录时间',
     created_time DATETIME     NOT NULL COMMENT '创建时间',
-    PRIMARY KEY (id)
-);
+    PRIMARY KEY (id, created_time)
+)
+    PARTITION BY RANGE (TO_DAYS(created_time)) (PARTITION pmax VALUES LESS THAN MAXVALUE);
 
 CREATE INDEX ix_sys_login_log_id ON sys_login_log (id);
 
+CREATE INDEX ix_sys_login_log_created_time ON sys_login_log (created_time);
+
 CREATE TABLE sys_menu
 (
     id           INTEGER     NOT NULL AUTO_INCREMENT,
@@ -144,11 +147,32 @@ CREATE TABLE sys_opera_log
     cost_time    FLOAT        NOT NULL COMMENT '请求耗时ms',
     opera_time   DATETIME     NOT NULL COMMENT '操作时间',
     created_time DATETIME     NOT NULL COMMENT '创建时间',
-    PRIMARY KEY (id)
-);
+    PRIMARY KEY (id, created_time)
+)
+    PARTITION BY RANGE (TO_DAYS(created_time)) (PARTITION pmax VALUES LESS THAN MAXVALUE);
 
 CREATE INDEX ix_sys_opera_log_id ON sys_opera_log (id);
 
+CREATE INDEX ix_sys_opera_log_created_time ON sys_opera_log (created_time);
+
+CREATE TABLE sys_request_rollup
+(
+    id           INTEGER      NOT NULL AUTO_INCREMENT,
+    granularity  VARCHAR(10)  NOT NULL COMMENT '时间粒度（minute, hour）',
+    bucket_time  DATETIME     NOT NULL COMMENT '时间桶起点',
+    path         VARCHAR(500) NOT NULL COMMENT '请求路径',
+    username     VARCHAR(20)  NOT NULL COMMENT '用户名，匿名请求为空字符串',
+    count        INTEGER      NOT NULL COMMENT '请求数',
+    error_count  INTEGER      NOT NULL COMMENT '异常请求数',
+    cost_sum     FLOAT        NOT NULL COMMENT '总耗时ms',
+    cost_max     FLOAT        NOT NULL COMMENT '最大耗时ms',
+    sketch       JSON         NOT NULL COMMENT '耗时分位数 sketch',
+    PRIMARY KEY (id),
+    CONSTRAINT uq_sys_request_rollup_bucket UNIQUE (granularity, bucket_time, path, username)
+);
+
+CREATE INDEX ix_sys_request_rollup_id ON sys_request_rollup (id);
+
 CREATE TABLE sys_role
 (
     id           INTEGER     NOT NULL AUTO_INCREMENT,
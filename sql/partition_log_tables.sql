@@ -0,0 +1,59 @@
+-- 将已有的操作日志、登录日志表改为按月分区
+-- 分区列必须包含在主键中；执行后由 celery 任务 tasks.log_retention 维护后续分区
+-- 已有数据按月份放入各自的分区（从最早一条日志所在月份到当月之后 3 个月），pmax 从一开始就保持为空，
+-- 之后拆分 pmax 不需要搬移数据，早于保留期的分区会在下次维护时直接删除
+
+ALTER TABLE sys_opera_log
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, created_time);
+
+CREATE INDEX ix_sys_opera_log_created_time ON sys_opera_log (created_time);
+
+ALTER TABLE sys_login_log
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, created_time);
+
+CREATE INDEX ix_sys_login_log_created_time ON sys_login_log (created_time);
+
+DROP PROCEDURE IF EXISTS fba_partition_by_month;
+
+DELIMITER //
+CREATE PROCEDURE fba_partition_by_month(IN tbl VARCHAR(64), IN precreate_months INT)
+BEGIN
+    DECLARE month_start DATE;
+    DECLARE last_month DATE;
+    DECLARE next_month DATE;
+    DECLARE parts TEXT DEFAULT '';
+
+    SET @first_month = NULL;
+    SET @stmt = CONCAT('SELECT DATE_FORMAT(MIN(created_time), ''%Y-%m-01'') INTO @first_month FROM ', tbl);
+    PREPARE stmt FROM @stmt;
+    EXECUTE stmt;
+    DEALLOCATE PREPARE stmt;
+
+    SET month_start = COALESCE(@first_month, DATE_FORMAT(CURDATE(), '%Y-%m-01'));
+    SET last_month = DATE_ADD(DATE_FORMAT(CURDATE(), '%Y-%m-01'), INTERVAL precreate_months MONTH);
+    WHILE month_start <= last_month DO
+        SET next_month = DATE_ADD(month_start, INTERVAL 1 MONTH);
+        SET parts = CONCAT(
+            parts, 'PARTITION p', DATE_FORMAT(month_start, '%Y%m'),
+            ' VALUES LESS THAN (TO_DAYS(''', next_month, ''')), '
+        );
+        SET month_start = next_month;
+    END WHILE;
+
+    SET @stmt = CONCAT(
+        'ALTER TABLE ', tbl, ' PARTITION BY RANGE (TO_DAYS(created_time)) (',
+        parts, 'PARTITION pmax VALUES LESS THAN MAXVALUE)'
+    );
+    PREPARE stmt FROM @stmt;
+    EXECUTE stmt;
+    DEALLOCATE PREPARE stmt;
+END //
+DELIMITER ;
+
+-- 第二个参数与 settings.LOG_PARTITION_PRECREATE_MONTHS 保持一致
+CALL fba_partition_by_month('sys_opera_log', 3);
+CALL fba_partition_by_month('sys_login_log', 3);
+
+DROP PROCEDURE fba_partition_by_month;